@@ -1,12 +1,11 @@
 from __future__ import annotations
 
 import os
-import time
 from datetime import datetime, timezone
 from typing import Dict, List, Tuple
 
 from app.agents import planner, reviewer, tools
-from app.services import observability
+from app.services import observability, tracing
 from app.services.chat_strategy import generate_strategy_reply
 
 LAST_RUN_AT: str | None = None
@@ -71,65 +70,59 @@ def run_strategy_agent(
 
     try:
         # Plan step
-        t0 = time.perf_counter()
-        constraints = tools.extract_constraints(campaign)
-        rec_summary = tools.summarize_recommendations(recommendations)
-        plan = planner.build_plan(constraints, rec_summary, user_question)
-        t1 = time.perf_counter()
-        ms = (t1 - t0) * 1000
+        with tracing.span("agent", "plan") as step:
+            constraints = tools.extract_constraints(campaign)
+            rec_summary = tools.summarize_recommendations(recommendations)
+            plan = planner.build_plan(constraints, rec_summary, user_question)
         trace.append(
             {
                 "name": "plan",
                 "summary": _summarize_plan(plan),
-                "latency_ms": max(1, int(round(ms))),
+                "latency_ms": max(1, int(round(step.elapsed_ms))),
             }
         )
 
         # Draft step
-        t0 = time.perf_counter()
-        llm_key = os.environ.get("OPENAI_API_KEY")
-        if llm_key:
-            model_used = os.environ.get("OPENAI_MODEL")
-            try:
-                draft = generate_strategy_reply(
-                    campaign=campaign,
-                    recommendations=recommendations,
-                    user_question=user_question,
-                )
-                observability.record_llm_call(True)
-            except Exception:
-                observability.record_llm_call(False)
-                raise
-        else:
-            draft = _build_deterministic_reply(plan, rec_summary)
-            fallback_used = True
-        t1 = time.perf_counter()
-        ms = (t1 - t0) * 1000
+        with tracing.span("agent", "draft") as step:
+            llm_key = os.environ.get("OPENAI_API_KEY")
+            if llm_key:
+                model_used = os.environ.get("OPENAI_MODEL")
+                try:
+                    draft = generate_strategy_reply(
+                        campaign=campaign,
+                        recommendations=recommendations,
+                        user_question=user_question,
+                    )
+                    observability.record_llm_call(True)
+                except Exception:
+                    observability.record_llm_call(False)
+                    raise
+            else:
+                draft = _build_deterministic_reply(plan, rec_summary)
+                fallback_used = True
         trace.append(
             {
                 "name": "draft",
                 "summary": "Generated strategy draft.",
-                "latency_ms": max(1, int(round(ms))),
+                "latency_ms": max(1, int(round(step.elapsed_ms))),
             }
         )
 
         # Review step
-        t0 = time.perf_counter()
-        ok, issues = reviewer.review_draft(draft, campaign)
-        if not ok:
-            fixes = "\n".join([f"- {issue}" for issue in issues])
-            draft = f"{draft}\n\nFixes:\n{fixes}"
+        with tracing.span("agent", "review") as step:
             ok, issues = reviewer.review_draft(draft, campaign)
-        if not ok:
-            draft = _build_deterministic_reply(plan, rec_summary)
-            fallback_used = True
-        t1 = time.perf_counter()
-        ms = (t1 - t0) * 1000
+            if not ok:
+                fixes = "\n".join([f"- {issue}" for issue in issues])
+                draft = f"{draft}\n\nFixes:\n{fixes}"
+                ok, issues = reviewer.review_draft(draft, campaign)
+            if not ok:
+                draft = _build_deterministic_reply(plan, rec_summary)
+                fallback_used = True
         trace.append(
             {
                 "name": "review",
                 "summary": "Validated draft against campaign constraints.",
-                "latency_ms": max(1, int(round(ms))),
+                "latency_ms": max(1, int(round(step.elapsed_ms))),
             }
         )
 
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import argparse
+import gc
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterator, List
+
+from app.models.schemas import Influencer
+from app.services import catalog, ingestion
+
+_CATEGORIES = ("beauty", "skincare", "gaming", "fitness", "fashion", "travel", "food", "tech")
+_REGIONS = ("Thailand", "Vietnam", "Singapore", "Indonesia", "Malaysia", "Philippines")
+_PLATFORMS = ("Instagram", "TikTok", "YouTube")
+_AGE_RANGES = ("18-24", "25-34", "35-44")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Measure resident bytes per influencer for the catalog representations."
+    )
+    parser.add_argument("--size", type=int, default=1_000_000, help="Creators in the columnar catalog.")
+    parser.add_argument(
+        "--legacy-size",
+        type=int,
+        default=100_000,
+        help="Creators for the object baseline (extrapolated linearly to --size).",
+    )
+    args = parser.parse_args()
+
+    rows = [
+        _measure("columnar catalog + RAG docs", args.size, _columnar),
+        _measure("legacy models + docs + id map", args.legacy_size, _legacy),
+    ]
+    print(_format_table(rows, args.size))
+
+
+def _influencers(size: int) -> Iterator[Influencer]:
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for row in range(size):
+        category = _CATEGORIES[row % len(_CATEGORIES)]
+        region = _REGIONS[row % len(_REGIONS)]
+        yield Influencer(
+            id=f"inf-{row:08d}",
+            name=f"Creator {row}",
+            platform=_PLATFORMS[row % len(_PLATFORMS)],
+            category=category,
+            followers=10_000 + row,
+            engagement_rate=(row % 97) / 1000,
+            region=region,
+            languages=["en", "th"] if row % 2 else ["en"],
+            audience_age_range=_AGE_RANGES[row % len(_AGE_RANGES)],
+            bio=f"{category.title()} creator in {region} sharing weekly reviews, tips and routines #{row}.",
+            source="csv",
+            last_crawled_at=now,
+            stats_updated_at=now - timedelta(days=row % 45),
+        )
+
+
+def _columnar(size: int) -> object:
+    builder = catalog.CatalogBuilder()
+    builder.extend(_influencers(size))
+    built = catalog.build_catalog(builder.finish(), version=1)
+    # The RAG docs share the catalog's columns, so this adds no strings.
+    return built, ingestion._rag_docs(built)
+
+
+@dataclass(frozen=True)
+class _LegacyDoc:
+    """The pre-columnar rag.InfluencerDoc: a frozen dataclass with a __dict__."""
+
+    id: str
+    name: str
+    bio: str
+    category: str
+    region: str
+
+
+def _legacy(size: int) -> object:
+    influencers = list(_influencers(size))
+    docs = [
+        _LegacyDoc(
+            id=influencer.id,
+            name=influencer.name,
+            bio=influencer.bio,
+            category=influencer.category,
+            region=influencer.region,
+        )
+        for influencer in influencers
+    ]
+    rows_by_id = {influencer.id: row for row, influencer in enumerate(influencers)}
+    return influencers, docs, rows_by_id
+
+
+def _measure(label: str, size: int, build: Callable[[int], object]) -> Dict[str, object]:
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    held = build(size)
+    gc.collect()
+    resident, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return {
+        "label": label,
+        "size": size,
+        "resident": resident - baseline,
+        "peak": peak - baseline,
+    }
+
+
+def _format_table(rows: List[Dict[str, object]], size: int) -> str:
+    lines = [
+        "# Catalog Memory Benchmark",
+        "",
+        f"| Representation | Creators | Bytes/creator | Resident MiB | Peak MiB | MiB at {size} |",
+        "| --- | --- | --- | --- | --- | --- |",
+    ]
+    for row in rows:
+        per_creator = row["resident"] / max(row["size"], 1)
+        lines.append(
+            f"| {row['label']} | {row['size']} | {per_creator:.0f} "
+            f"| {row['resident'] / 2**20:.1f} | {row['peak'] / 2**20:.1f} "
+            f"| {per_creator * size / 2**20:.0f} |"
+        )
+    lines.append("")
+    lines.append("Measured with tracemalloc (Python objects and NumPy buffers).")
+    return "\n".join(lines) + "\n"
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,17 @@
+import hmac
 import json
 import logging
 import os
 import time
-from datetime import datetime, timezone
-from typing import Literal, List
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, Literal, List
 
 from uuid import uuid4
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
 
 from app.models.schemas import (
@@ -16,11 +19,29 @@ from app.models.schemas import (
     Influencer,
     RecommendationRequest,
     RecommendationResponse,
+    RecommendationResponseItem,
 )
 from app.agents import runner
-from app.services import ingestion, observability
-from app.services.rag import search_influencers
-from app.services.recommender import compute_recommendations
+from app.services import (
+    catalog,
+    http_client,
+    ingestion_scheduler,
+    observability,
+    profiler,
+    scoring_pool,
+    tracing,
+)
+from app.services.rag import (
+    InfluencerDoc,
+    get_index,
+    search_influencers_async,
+    search_influencers_batch_async,
+)
+from app.services.recommender import (
+    InvalidCursorError,
+    compute_recommendations,
+    recommendation_page,
+)
 
 app = FastAPI(
     title="NivoxAI Backend AI Service",
@@ -30,6 +51,11 @@ app = FastAPI(
 
 logger = logging.getLogger(__name__)
 START_TIME = time.time()
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Items per streamed chunk; each chunk costs one threadpool hop.
+NDJSON_CHUNK_ITEMS = 256
+# Queries accepted per /rag/influencers:batch request.
+RAG_BATCH_MAX_QUERIES = int(os.environ.get("RAG_BATCH_MAX_QUERIES", "256"))
 
 cors_origins_env = os.environ.get("CORS_ORIGINS", "http://localhost:3000")
 cors_origins = [origin.strip() for origin in cors_origins_env.split(",") if origin.strip()]
@@ -46,11 +72,14 @@ app.add_middleware(
 async def request_context_middleware(request, call_next):
     request_id = request.headers.get("x-request-id") or uuid4().hex
     start = time.perf_counter()
+    trace = tracing.start_trace()
     try:
         response = await call_next(request)
         status_code = response.status_code
-        latency_ms = max(1, int(round((time.perf_counter() - start) * 1000)))
-        observability.record_request(request.url.path, status_code, latency_ms)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        latency_ms = max(1, int(round(elapsed_ms)))
+        stages = tracing.finish_trace(trace)
+        observability.record_request(_route_label(request), status_code, elapsed_ms)
         log_payload = {
             "request_id": request_id,
             "method": request.method,
@@ -58,13 +87,19 @@ async def request_context_middleware(request, call_next):
             "status_code": status_code,
             "latency_ms": latency_ms,
         }
+        if stages:
+            log_payload["stages_ms"] = _stage_breakdown(stages)
         logger.info(json.dumps(log_payload))
         response.headers["X-Request-Id"] = request_id
+        if tracing.SERVER_TIMING:
+            response.headers["Server-Timing"] = tracing.server_timing(stages, elapsed_ms)
         return response
     except Exception:
         status_code = 500
-        latency_ms = max(1, int(round((time.perf_counter() - start) * 1000)))
-        observability.record_request(request.url.path, status_code, latency_ms)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        latency_ms = max(1, int(round(elapsed_ms)))
+        stages = tracing.finish_trace(trace)
+        observability.record_request(_route_label(request), status_code, elapsed_ms)
         log_payload = {
             "request_id": request_id,
             "method": request.method,
@@ -72,10 +107,24 @@ async def request_context_middleware(request, call_next):
             "status_code": status_code,
             "latency_ms": latency_ms,
         }
+        if stages:
+            log_payload["stages_ms"] = _stage_breakdown(stages)
         logger.info(json.dumps(log_payload))
         raise
 
 
+def _stage_breakdown(stages: Dict[str, float]) -> Dict[str, float]:
+    # Streaming responses log before their body is produced, so stages timed
+    # while streaming are only in the stage histograms.
+    return {name: round(ms, 3) for name, ms in stages.items()}
+
+
+def _route_label(request: Request) -> str:
+    # The route template rather than the raw path, so unmatched paths (scans,
+    # typos) cannot grow the number of metric series without bound.
+    return getattr(request.scope.get("route"), "path", "<unmatched>")
+
+
 # --------- RAG MODELS ---------
 
 
@@ -88,6 +137,15 @@ class RagQuery(BaseModel):
     candidate_k: int | None = None
 
 
+class RagBatchQuery(BaseModel):
+    """Many RAG queries sharing one set of search options."""
+    queries: List[str] = Field(max_length=RAG_BATCH_MAX_QUERIES)
+    top_k: int = 5
+    mode: Literal["vector", "keyword", "hybrid"] | None = None
+    rerank: bool = False
+    candidate_k: int | None = None
+
+
 class RagInfluencerHit(BaseModel):
     """Single RAG search hit for an influencer."""
     id: str
@@ -162,7 +220,19 @@ def health_check() -> dict:
 
 @app.get("/metrics")
 def metrics() -> dict:
-    return observability.get_metrics()
+    payload = observability.get_metrics()
+    profile = profiler.top_frames()
+    if profile is not None:
+        payload["profile"] = profile
+    return payload
+
+
+@app.get("/metrics/prometheus", response_class=PlainTextResponse)
+def prometheus_metrics() -> PlainTextResponse:
+    """The same metrics in the Prometheus text exposition format, for scraping."""
+    return PlainTextResponse(
+        observability.render_prometheus(), media_type=observability.PROMETHEUS_CONTENT_TYPE
+    )
 
 
 @app.get("/healthz")
@@ -191,6 +261,8 @@ def model_status_v1() -> dict:
     except Exception:
         status = "offline"
 
+    index = get_index()
+    resident = catalog.get_catalog()
     return {
         "status": status,
         "model_name": model_name,
@@ -198,6 +270,11 @@ def model_status_v1() -> dict:
         "version": model_version,
         "last_reload_at": last_reload_at,
         "last_embedding_refresh_at": last_embedding_refresh_at,
+        "index_version": index.version,
+        "index_built_at": index.built_at,
+        "index_size": len(index.docs),
+        "catalog_version": resident.version,
+        "catalog_size": len(resident),
         "uptime_s": int(time.time() - START_TIME),
         "time": now,
     }
@@ -226,26 +303,104 @@ def agent_status():
 
 @app.get("/v1/ingestion/status", tags=["Ingestion"])
 def ingestion_status() -> dict:
-    return {
-        "last_run_at": ingestion.LAST_RUN_AT,
-        "records_updated": ingestion.LAST_RECORDS_UPDATED,
-        "last_error": ingestion.LAST_ERROR,
+    return ingestion_scheduler.status()
+
+
+# --------- ADMIN ---------
+
+
+@app.get("/admin/profile", tags=["Admin"])
+def admin_profile(
+    seconds: float = Query(5.0, gt=0, le=profiler.MAX_SECONDS),
+    interval_ms: float = Query(profiler.INTERVAL_MS, ge=1, le=1000),
+    format: Literal["collapsed", "pstats"] = "collapsed",
+    include_idle: bool = False,
+    x_admin_token: str | None = Header(default=None),
+) -> Response:
+    """
+    Sample every thread of this worker process for ``seconds``.
+
+    Requires PROFILER_TOKEN to be set and sent as X-Admin-Token. Returns
+    folded stacks for flamegraph tools, or with ``format=pstats`` a file
+    for ``python -m pstats`` / snakeviz. Threads waiting on a lock or
+    selector are left out unless ``include_idle`` is true.
+    """
+    if profiler.TOKEN is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not hmac.compare_digest(
+        x_admin_token.encode("utf-8"), profiler.TOKEN.encode("utf-8")
+    ):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    try:
+        profile = profiler.sample(seconds, interval_ms, include_idle)
+    except profiler.ProfilerBusyError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+
+    headers = {
+        "X-Profile-Ticks": str(profile.ticks),
+        "X-Profile-Samples": str(sum(profile.samples.values())),
+        "X-Profile-Pid": str(os.getpid()),
     }
+    if format == "pstats":
+        try:
+            dump = profile.pstats_dump()
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=422, detail=f"{exc}; retry with more seconds or include_idle=true"
+            ) from exc
+        headers["Content-Disposition"] = f'attachment; filename="profile-{os.getpid()}.pstats"'
+        return Response(dump, media_type="application/octet-stream", headers=headers)
+    return PlainTextResponse(profile.collapsed(), headers=headers)
 
 
 # --------- RECOMMENDATION ENDPOINTS ---------
 
 
 @app.post("/recommend", response_model=RecommendationResponse)
-def recommend(request: RecommendationRequest) -> RecommendationResponse:
+def recommend(request: RecommendationRequest, http_request: Request):
     """
     Main recommendation endpoint.
 
+    Returns ``top_n`` items starting at ``offset`` (or ``cursor``);
+    follow ``next_cursor`` for further pages. Send
+    ``Accept: application/x-ndjson`` to stream ranked items as
+    newline-delimited JSON (one RecommendationResponseItem per line, next
+    cursor in the X-Next-Cursor header) instead of a single
+    RecommendationResponse body. The page is fully ranked before the
+    first line is sent, so this is a framing change: it saves buffering
+    the whole body, not time to first byte.
+
+    Candidates come from ``request.influencers`` when supplied, otherwise
+    from the resident catalog loaded by ingestion, narrowed by
+    ``influencer_ids`` and/or ``filters``.
+
     Delegates to app.services.recommender.compute_recommendations,
     which can internally combine heuristic and ML-based scoring
     for influencer–campaign fit.
     """
-    return compute_recommendations(request)
+    try:
+        if NDJSON_MEDIA_TYPE in http_request.headers.get("accept", ""):
+            page = recommendation_page(request)
+            headers = {"X-Campaign-Id": request.campaign.id}
+            if page.next_cursor:
+                headers["X-Next-Cursor"] = page.next_cursor
+            return StreamingResponse(
+                _ndjson_chunks(page.items), media_type=NDJSON_MEDIA_TYPE, headers=headers
+            )
+        return compute_recommendations(request)
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+def _ndjson_chunks(items: Iterable[RecommendationResponseItem]) -> Iterator[str]:
+    lines: list[str] = []
+    for item in items:
+        lines.append(item.model_dump_json())
+        if len(lines) >= NDJSON_CHUNK_ITEMS:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
 
 
 @app.get("/sample-recommendation", response_model=RecommendationResponse)
@@ -255,8 +410,16 @@ def sample_recommendation() -> RecommendationResponse:
     a small influencer set to demonstrate the ranking logic.
 
     Useful for smoke tests and demos without needing frontend input.
+    The request is rebuilt once a day, so repeat hits are served from the
+    recommender's result cache.
     """
+    return compute_recommendations(_sample_request(datetime.now(timezone.utc).date()))
+
 
+@lru_cache(maxsize=1)
+def _sample_request(day: date) -> RecommendationRequest:
+    # ``day`` only keys the cache: timestamps stay "fresh" for the day.
+    now = datetime.now(timezone.utc)
     campaign = Campaign(
         id="camp-001",
         brand_name="Luma Beauty",
@@ -280,8 +443,8 @@ def sample_recommendation() -> RecommendationResponse:
             audience_age_range="18-24",
             bio="Beauty creator sharing skincare routines and summer glow tips.",
             source="sample",
-            last_crawled_at=datetime.now(timezone.utc),
-            stats_updated_at=datetime.now(timezone.utc),
+            last_crawled_at=now,
+            stats_updated_at=now,
         ),
         Influencer(
             id="inf-002",
@@ -295,8 +458,8 @@ def sample_recommendation() -> RecommendationResponse:
             audience_age_range="25-34",
             bio="Fitness coach with a focus on wellness and outdoor workouts.",
             source="sample",
-            last_crawled_at=datetime.now(timezone.utc),
-            stats_updated_at=datetime.now(timezone.utc),
+            last_crawled_at=now,
+            stats_updated_at=now,
         ),
         Influencer(
             id="inf-003",
@@ -310,8 +473,8 @@ def sample_recommendation() -> RecommendationResponse:
             audience_age_range="18-24",
             bio="Fashion hauls and beauty collaborations across Asia.",
             source="sample",
-            last_crawled_at=datetime.now(timezone.utc),
-            stats_updated_at=datetime.now(timezone.utc),
+            last_crawled_at=now,
+            stats_updated_at=now,
         ),
         Influencer(
             id="inf-004",
@@ -325,8 +488,8 @@ def sample_recommendation() -> RecommendationResponse:
             audience_age_range="18-24",
             bio="Skincare reviews, ingredient deep dives, and glow routines.",
             source="sample",
-            last_crawled_at=datetime.now(timezone.utc),
-            stats_updated_at=datetime.now(timezone.utc),
+            last_crawled_at=now,
+            stats_updated_at=now,
         ),
         Influencer(
             id="inf-005",
@@ -340,8 +503,8 @@ def sample_recommendation() -> RecommendationResponse:
             audience_age_range="25-34",
             bio="Travel vlogs with a focus on coastal destinations.",
             source="sample",
-            last_crawled_at=datetime.now(timezone.utc),
-            stats_updated_at=datetime.now(timezone.utc),
+            last_crawled_at=now,
+            stats_updated_at=now,
         ),
         Influencer(
             id="inf-006",
@@ -355,28 +518,27 @@ def sample_recommendation() -> RecommendationResponse:
             audience_age_range="18-24",
             bio="Daily skincare habits and product spotlights for humid weather.",
             source="sample",
-            last_crawled_at=datetime.now(timezone.utc),
-            stats_updated_at=datetime.now(timezone.utc),
+            last_crawled_at=now,
+            stats_updated_at=now,
         ),
     ]
 
-    req = RecommendationRequest(campaign=campaign, influencers=influencers)
-    return compute_recommendations(req)
+    return RecommendationRequest(campaign=campaign, influencers=influencers)
 
 
 # --------- RAG ENDPOINTS ---------
 
 
 @app.post("/rag/influencers", response_model=list[RagInfluencerHit])
-def rag_influencers(query: RagQuery) -> list[RagInfluencerHit]:
+async def rag_influencers(query: RagQuery) -> list[RagInfluencerHit]:
     """
     RAG-style influencer search.
 
-    Uses app.services.rag.search_influencers to retrieve the most relevant
+    Uses app.services.rag.search_influencers_async to retrieve the most relevant
     influencer documents for a free-text query (e.g. “Thai skincare KOLs”).
     """
 
-    results: list[tuple[InfluencerDoc, float]] = search_influencers(
+    results: list[tuple[InfluencerDoc, float]] = await search_influencers_async(
         query.query,
         top_k=query.top_k,
         mode=query.mode,
@@ -384,7 +546,31 @@ def rag_influencers(query: RagQuery) -> list[RagInfluencerHit]:
         candidate_k=query.candidate_k,
     )
 
-    hits: list[RagInfluencerHit] = [
+    return _to_hits(results)
+
+
+@app.post("/rag/influencers:batch", response_model=list[list[RagInfluencerHit]])
+async def rag_influencers_batch(batch: RagBatchQuery) -> list[list[RagInfluencerHit]]:
+    """
+    Batch RAG search.
+
+    Scores every query in one pass over the index via
+    app.services.rag.search_influencers_batch_async; results are returned
+    in the same order as the submitted queries.
+    """
+
+    results = await search_influencers_batch_async(
+        batch.queries,
+        top_k=batch.top_k,
+        mode=batch.mode,
+        rerank=batch.rerank,
+        candidate_k=batch.candidate_k,
+    )
+    return [_to_hits(hits) for hits in results]
+
+
+def _to_hits(results: list[tuple[InfluencerDoc, float]]) -> list[RagInfluencerHit]:
+    return [
         RagInfluencerHit(
             id=doc.id,
             name=doc.name,
@@ -395,14 +581,43 @@ def rag_influencers(query: RagQuery) -> list[RagInfluencerHit]:
         )
         for doc, score in results
     ]
-    return hits
 
 
 @app.on_event("startup")
 def start_ingestion_scheduler() -> None:
     if os.environ.get("INGESTION_ENABLED", "true").lower() != "true":
         return
-    ingestion.schedule_daily_ingestion()
+    ingestion_scheduler.start()
+
+
+@app.on_event("startup")
+def start_scoring_pool() -> None:
+    scoring_pool.start()
+
+
+@app.on_event("startup")
+def start_profiler() -> None:
+    profiler.start()
+
+
+@app.on_event("shutdown")
+async def close_http_clients() -> None:
+    await http_client.get_llm_client().aclose()
+
+
+@app.on_event("shutdown")
+def stop_scoring_pool() -> None:
+    scoring_pool.shutdown()
+
+
+@app.on_event("shutdown")
+def stop_ingestion_scheduler() -> None:
+    ingestion_scheduler.shutdown()
+
+
+@app.on_event("shutdown")
+def stop_profiler() -> None:
+    profiler.shutdown()
 
 
 # --------- STRATEGY / AGENTIC CHAT ---------
@@ -1,7 +1,7 @@
 from datetime import datetime
-from typing import List
+from typing import List, Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class Influencer(BaseModel):
@@ -30,9 +30,25 @@ class Campaign(BaseModel):
     description: str
 
 
+class CatalogFilter(BaseModel):
+    regions: List[str] | None = None
+    categories: List[str] | None = None
+    age_ranges: List[str] | None = None
+    platforms: List[str] | None = None
+
+
 class RecommendationRequest(BaseModel):
     campaign: Campaign
-    influencers: List[Influencer]
+    # Inline candidates; when omitted the server-side catalog is scored.
+    influencers: List[Influencer] | None = None
+    influencer_ids: List[str] | None = None
+    filters: CatalogFilter | None = None
+    # Drop candidates that miss these campaign features before scoring.
+    strict_filters: List[Literal["region", "category", "age_range"]] | None = None
+    top_n: int = Field(default=10, ge=1)
+    offset: int = Field(default=0, ge=0)
+    # Opaque next_cursor from a previous page; takes precedence over offset.
+    cursor: str | None = None
 
 
 class RecommendationResponseItem(BaseModel):
@@ -44,3 +60,4 @@ class RecommendationResponseItem(BaseModel):
 class RecommendationResponse(BaseModel):
     campaign_id: str
     recommendations: List[RecommendationResponseItem]
+    next_cursor: str | None = None
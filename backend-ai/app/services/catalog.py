@@ -0,0 +1,683 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import threading
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Sequence, Tuple
+from uuid import uuid4
+
+import numpy as np
+
+from app.models.schemas import Influencer
+from app.services import observability
+from app.services.columnar import (
+    IdIndex,
+    InternedColumn,
+    InternedColumnBuilder,
+    StringColumn,
+    StringColumnBuilder,
+)
+
+logger = logging.getLogger(__name__)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+# Sentinel for "no stats_updated_at": the far future, so the row's age
+# clips to zero days and it gets no freshness decay without a mask.
+MISSING_TIMESTAMP_US = np.iinfo(np.int64).max
+# Joins an influencer's languages into one packed string.
+LANGUAGE_SEPARATOR = "\x1f"
+
+
+@dataclass(frozen=True)
+class InfluencerColumns:
+    """Columnar view of a candidate list used by the vectorized scorer.
+
+    This is the feature store the scorer reads: it is materialized once
+    when ingestion publishes the catalog, so request-time scoring is array
+    arithmetic only. String features are dictionary-encoded:
+    ``region_codes[i]`` indexes into ``regions`` (likewise for categories,
+    age ranges and platforms), and ``category_keys`` holds the lowercased
+    category per code for brief matching. Timestamps are UTC epoch
+    microseconds so freshness days match ``timedelta.days`` exactly.
+    """
+
+    ids: StringColumn
+    categories: Tuple[str, ...]
+    category_keys: Tuple[str, ...]
+    category_codes: np.ndarray
+    regions: Tuple[str, ...]
+    region_codes: np.ndarray
+    age_ranges: Tuple[str, ...]
+    age_codes: np.ndarray
+    platforms: Tuple[str, ...]
+    platform_codes: np.ndarray
+    engagement: np.ndarray
+    stats_updated_us: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def take(self, rows: np.ndarray) -> InfluencerColumns:
+        """Return the subset at ``rows``; dictionaries are shared, not re-encoded."""
+        return InfluencerColumns(
+            ids=self.ids.take(rows),
+            categories=self.categories,
+            category_keys=self.category_keys,
+            category_codes=self.category_codes[rows],
+            regions=self.regions,
+            region_codes=self.region_codes[rows],
+            age_ranges=self.age_ranges,
+            age_codes=self.age_codes[rows],
+            platforms=self.platforms,
+            platform_codes=self.platform_codes[rows],
+            engagement=self.engagement[rows],
+            stats_updated_us=self.stats_updated_us[rows],
+        )
+
+    def category(self, row: int) -> str:
+        return self.categories[self.category_codes[row]]
+
+    @classmethod
+    def concat(cls, parts: Sequence[InfluencerColumns]) -> InfluencerColumns:
+        """Stack ``parts`` in order, merging their value dictionaries."""
+        categories = _concat_interned(parts, "categories", "category_codes")
+        regions = _concat_interned(parts, "regions", "region_codes")
+        age_ranges = _concat_interned(parts, "age_ranges", "age_codes")
+        platforms = _concat_interned(parts, "platforms", "platform_codes")
+        return InfluencerColumns(
+            ids=StringColumn.concat([part.ids for part in parts]),
+            categories=categories.values,
+            category_keys=tuple(category.lower() for category in categories.values),
+            category_codes=categories.codes,
+            regions=regions.values,
+            region_codes=regions.codes,
+            age_ranges=age_ranges.values,
+            age_codes=age_ranges.codes,
+            platforms=platforms.values,
+            platform_codes=platforms.codes,
+            engagement=np.concatenate([part.engagement for part in parts]),
+            stats_updated_us=np.concatenate([part.stats_updated_us for part in parts]),
+        )
+
+
+def _concat_interned(
+    parts: Sequence[InfluencerColumns], values: str, codes: str
+) -> InternedColumn:
+    return InternedColumn.concat(
+        [InternedColumn(getattr(part, values), getattr(part, codes)) for part in parts]
+    )
+
+
+class _ColumnsBuilder:
+    """Appends influencers straight into packed buffers, one row at a time."""
+
+    __slots__ = (
+        "ids",
+        "categories",
+        "regions",
+        "age_ranges",
+        "platforms",
+        "engagement",
+        "stats_updated_us",
+    )
+
+    def __init__(self) -> None:
+        self.ids = StringColumnBuilder()
+        self.categories = InternedColumnBuilder()
+        self.regions = InternedColumnBuilder()
+        self.age_ranges = InternedColumnBuilder()
+        self.platforms = InternedColumnBuilder()
+        self.engagement = array("d")
+        self.stats_updated_us = array("q")
+
+    def append(self, influencer: Influencer) -> None:
+        self.ids.append(influencer.id)
+        self.categories.append(influencer.category)
+        self.regions.append(influencer.region)
+        self.age_ranges.append(influencer.audience_age_range)
+        self.platforms.append(influencer.platform)
+        self.engagement.append(influencer.engagement_rate)
+        self.stats_updated_us.append(epoch_us(influencer.stats_updated_at))
+
+    def finish(self) -> InfluencerColumns:
+        categories = self.categories.finish()
+        regions = self.regions.finish()
+        age_ranges = self.age_ranges.finish()
+        platforms = self.platforms.finish()
+        return InfluencerColumns(
+            ids=self.ids.finish(),
+            categories=categories.values,
+            category_keys=tuple(category.lower() for category in categories.values),
+            category_codes=categories.codes,
+            regions=regions.values,
+            region_codes=regions.codes,
+            age_ranges=age_ranges.values,
+            age_codes=age_ranges.codes,
+            platforms=platforms.values,
+            platform_codes=platforms.codes,
+            engagement=np.frombuffer(self.engagement, dtype=np.float64),
+            stats_updated_us=np.frombuffer(self.stats_updated_us, dtype=np.int64),
+        )
+
+
+def build_columns(influencers: Iterable[Influencer]) -> InfluencerColumns:
+    builder = _ColumnsBuilder()
+    for influencer in influencers:
+        builder.append(influencer)
+    return builder.finish()
+
+
+def epoch_us(value: datetime | None) -> int:
+    if value is None:
+        return MISSING_TIMESTAMP_US
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def from_epoch_us(value: int) -> datetime | None:
+    if value == MISSING_TIMESTAMP_US:
+        return None
+    return _EPOCH + timedelta(microseconds=int(value))
+
+
+@dataclass(frozen=True)
+class InvertedIndex:
+    """Field value -> sorted catalog rows, for region, category, age range and platform.
+
+    Values within one field are OR-ed (postings are disjoint, so a union is
+    a concatenate + sort); fields are AND-ed starting from the smallest
+    posting list, binary-searching each candidate in the others, so cost
+    follows the candidate count rather than the catalog size.
+    """
+
+    size: int
+    postings: Dict[str, Dict[str, np.ndarray]]
+
+    def lookup(self, field: str, values: Iterable[str]) -> np.ndarray:
+        by_value = self.postings[field]
+        parts = [by_value[value] for value in dict.fromkeys(values) if value in by_value]
+        if not parts:
+            return np.empty(0, dtype=np.intp)
+        if len(parts) == 1:
+            return parts[0]
+        return np.sort(np.concatenate(parts))
+
+    def match(
+        self,
+        constraints: Sequence[Tuple[str, Sequence[str]]],
+        within: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """Rows satisfying every ``(field, allowed values)`` constraint.
+
+        With ``within`` the result is the matching subset of those rows in
+        their given order; otherwise rows are returned in catalog order.
+        """
+        postings = sorted((self.lookup(field, values) for field, values in constraints), key=len)
+        if within is not None:
+            rows = within
+        elif postings:
+            rows, postings = postings[0], postings[1:]
+        else:
+            return np.arange(self.size, dtype=np.intp)
+        for other in postings:
+            if rows.size == 0:
+                break
+            positions = np.searchsorted(other, rows)
+            found = positions < other.size
+            found[found] = other[positions[found]] == rows[found]
+            rows = rows[found]
+        return rows
+
+
+def build_inverted_index(columns: InfluencerColumns) -> InvertedIndex:
+    return InvertedIndex(
+        size=len(columns),
+        postings={
+            "region": _postings(columns.regions, columns.region_codes),
+            "category": _postings(columns.categories, columns.category_codes),
+            "age_range": _postings(columns.age_ranges, columns.age_codes),
+            "platform": _postings(columns.platforms, columns.platform_codes),
+        },
+    )
+
+
+def _postings(values: Tuple[str, ...], codes: np.ndarray) -> Dict[str, np.ndarray]:
+    # int32 rows halve the index; NumPy indexes with them directly.
+    order = np.argsort(codes, kind="stable").astype(_row_dtype(codes.size))
+    bounds = np.cumsum(np.bincount(codes, minlength=len(values)))[:-1]
+    return dict(zip(values, np.split(order, bounds)))
+
+
+def _row_dtype(size: int) -> type:
+    return np.int32 if size < 2**31 else np.int64
+
+
+@dataclass(frozen=True)
+class InfluencerCatalog:
+    """Immutable snapshot of the resident influencer catalog.
+
+    Like ``rag.RagIndex``, a new snapshot is built off to the side and
+    published with a single reference swap, so requests keep scoring the
+    snapshot they started with.
+
+    Every field is stored column-wise (packed strings, interned codes,
+    NumPy stats); no per-influencer objects stay resident. ``influencer``
+    materializes one row as a model when a caller needs it.
+    """
+
+    columns: InfluencerColumns
+    names: StringColumn
+    bios: StringColumn
+    # Languages joined with LANGUAGE_SEPARATOR.
+    languages: StringColumn
+    # "" stands for a missing source.
+    sources: InternedColumn
+    followers: np.ndarray
+    last_crawled_us: np.ndarray
+    # Fingerprint of each row's source record (0 when unknown), so the next
+    # ingestion can tell changed rows from unchanged ones.
+    content_hashes: np.ndarray
+    index: InvertedIndex
+    id_index: IdIndex
+    version: int
+    updated_at: str | None
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    def influencer(self, row: int) -> Influencer:
+        columns = self.columns
+        languages = self.languages[row]
+        return Influencer(
+            id=columns.ids[row],
+            name=self.names[row],
+            platform=columns.platforms[columns.platform_codes[row]],
+            category=columns.category(row),
+            followers=int(self.followers[row]),
+            engagement_rate=float(columns.engagement[row]),
+            region=columns.regions[columns.region_codes[row]],
+            languages=languages.split(LANGUAGE_SEPARATOR) if languages else [],
+            audience_age_range=columns.age_ranges[columns.age_codes[row]],
+            bio=self.bios[row],
+            source=self.sources[row] or None,
+            last_crawled_at=from_epoch_us(self.last_crawled_us[row]),
+            stats_updated_at=from_epoch_us(columns.stats_updated_us[row]),
+        )
+
+
+@dataclass(frozen=True)
+class CatalogRows:
+    """Packed influencer rows before deduplication and indexing.
+
+    What a ``CatalogBuilder`` produces. Plain arrays and string columns
+    only, so ingestion workers can return one cheaply and the parent can
+    ``concat`` them.
+    """
+
+    columns: InfluencerColumns
+    names: StringColumn
+    bios: StringColumn
+    languages: StringColumn
+    sources: InternedColumn
+    followers: np.ndarray
+    last_crawled_us: np.ndarray
+    content_hashes: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    def take(self, rows: np.ndarray) -> CatalogRows:
+        return CatalogRows(
+            columns=self.columns.take(rows),
+            names=self.names.take(rows),
+            bios=self.bios.take(rows),
+            languages=self.languages.take(rows),
+            sources=self.sources.take(rows),
+            followers=self.followers[rows],
+            last_crawled_us=self.last_crawled_us[rows],
+            content_hashes=self.content_hashes[rows],
+        )
+
+    @classmethod
+    def concat(cls, parts: Sequence[CatalogRows]) -> CatalogRows:
+        if len(parts) == 1:
+            return parts[0]
+        return CatalogRows(
+            columns=InfluencerColumns.concat([part.columns for part in parts]),
+            names=StringColumn.concat([part.names for part in parts]),
+            bios=StringColumn.concat([part.bios for part in parts]),
+            languages=StringColumn.concat([part.languages for part in parts]),
+            sources=InternedColumn.concat([part.sources for part in parts]),
+            followers=np.concatenate([part.followers for part in parts]),
+            last_crawled_us=np.concatenate([part.last_crawled_us for part in parts]),
+            content_hashes=np.concatenate([part.content_hashes for part in parts]),
+        )
+
+
+class CatalogBuilder:
+    """Accumulates influencers into packed columns for the next snapshot.
+
+    Rows are appended as they arrive, so building a catalog never holds
+    more than one ``Influencer`` model at a time.
+    """
+
+    def __init__(self) -> None:
+        self._columns = _ColumnsBuilder()
+        self._names = StringColumnBuilder()
+        self._bios = StringColumnBuilder()
+        self._languages = StringColumnBuilder()
+        self._sources = InternedColumnBuilder()
+        self._followers = array("q")
+        self._last_crawled_us = array("q")
+        self._content_hashes = array("Q")
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def append(self, influencer: Influencer, content_hash: int = 0) -> None:
+        self._columns.append(influencer)
+        self._names.append(influencer.name)
+        self._bios.append(influencer.bio)
+        self._languages.append(LANGUAGE_SEPARATOR.join(influencer.languages))
+        self._sources.append(influencer.source or "")
+        self._followers.append(influencer.followers)
+        self._last_crawled_us.append(epoch_us(influencer.last_crawled_at))
+        self._content_hashes.append(content_hash)
+
+    def extend(self, influencers: Iterable[Influencer]) -> None:
+        for influencer in influencers:
+            self.append(influencer)
+
+    def finish(self) -> CatalogRows:
+        return CatalogRows(
+            columns=self._columns.finish(),
+            names=self._names.finish(),
+            bios=self._bios.finish(),
+            languages=self._languages.finish(),
+            sources=self._sources.finish(),
+            followers=np.frombuffer(self._followers, dtype=np.int64),
+            last_crawled_us=np.frombuffer(self._last_crawled_us, dtype=np.int64),
+            content_hashes=np.frombuffer(self._content_hashes, dtype=np.uint64),
+        )
+
+
+def build_catalog(
+    rows: CatalogRows, version: int, updated_at: str | None = None
+) -> InfluencerCatalog:
+    """Deduplicate and index ``rows`` into a catalog snapshot.
+
+    An id that repeats keeps the row with the newest ``stats_updated_at``
+    (the later row on ties, or when neither has one), at the position of
+    its first occurrence.
+    """
+    id_index = IdIndex(rows.columns.ids)
+    stats_updated_us = rows.columns.stats_updated_us
+    # A missing timestamp is stored as the far future; rank it as oldest.
+    recency = np.where(
+        stats_updated_us == MISSING_TIMESTAMP_US, np.iinfo(np.int64).min, stats_updated_us
+    )
+    keep = id_index.dedupe_rows(priority=recency)
+    if keep is not None:
+        rows = rows.take(keep)
+        id_index = IdIndex(rows.columns.ids)
+
+    return InfluencerCatalog(
+        columns=rows.columns,
+        names=rows.names,
+        bios=rows.bios,
+        languages=rows.languages,
+        sources=rows.sources,
+        followers=rows.followers,
+        last_crawled_us=rows.last_crawled_us,
+        content_hashes=rows.content_hashes,
+        index=build_inverted_index(rows.columns),
+        id_index=id_index,
+        version=version,
+        updated_at=updated_at
+        or (datetime.now(timezone.utc).isoformat() if version else None),
+    )
+
+
+# --------- ON-DISK SNAPSHOTS ---------
+#
+# Same layout as the RAG index: <CATALOG_DIR>/CURRENT names the active
+# snapshot directory, which holds a manifest.json (version, value
+# dictionaries) plus one .npy file per column. Arrays are opened with
+# mmap_mode="r", so every worker on a node shares one copy in the page cache;
+# only the inverted and id indexes are rebuilt on load.
+
+CATALOG_DIR = os.environ.get("CATALOG_DIR") or (
+    os.path.join(os.environ["RAG_INDEX_DIR"], "catalog")
+    if os.environ.get("RAG_INDEX_DIR")
+    else None
+)
+CATALOG_KEEP = int(os.environ.get("CATALOG_KEEP", "2"))
+CATALOG_FORMAT_VERSION = 1
+
+_STRING_COLUMNS = ("ids", "names", "bios", "languages")
+_CODED_COLUMNS = {
+    # manifest key -> codes array
+    "categories": "category_codes",
+    "regions": "region_codes",
+    "age_ranges": "age_codes",
+    "platforms": "platform_codes",
+    "sources": "source_codes",
+}
+_NUMERIC_COLUMNS = (
+    "engagement",
+    "stats_updated_us",
+    "followers",
+    "last_crawled_us",
+    "content_hashes",
+)
+
+
+def save_catalog(
+    catalog: InfluencerCatalog | None = None, directory: str | None = None
+) -> str | None:
+    """Write ``catalog`` (default: the published one) as the current snapshot.
+
+    No-op returning None when no directory is configured.
+    """
+    directory = directory or CATALOG_DIR
+    if not directory:
+        return None
+    catalog = catalog or _CATALOG
+    os.makedirs(directory, exist_ok=True)
+
+    name = f"v{CATALOG_FORMAT_VERSION}-{catalog.version:08d}-{uuid4().hex[:8]}"
+    staging = os.path.join(directory, f".{name}.tmp")
+    os.makedirs(staging)
+    columns = catalog.columns
+    strings = {
+        "ids": columns.ids,
+        "names": catalog.names,
+        "bios": catalog.bios,
+        "languages": catalog.languages,
+    }
+    arrays = {
+        "category_codes": columns.category_codes,
+        "region_codes": columns.region_codes,
+        "age_codes": columns.age_codes,
+        "platform_codes": columns.platform_codes,
+        "source_codes": catalog.sources.codes,
+        "engagement": columns.engagement,
+        "stats_updated_us": columns.stats_updated_us,
+        "followers": catalog.followers,
+        "last_crawled_us": catalog.last_crawled_us,
+        "content_hashes": catalog.content_hashes,
+    }
+    for key, values in strings.items():
+        arrays[f"{key}.blob"] = values.blob
+        arrays[f"{key}.offsets"] = values.offsets
+    for key, data in arrays.items():
+        np.save(os.path.join(staging, f"{key}.npy"), data)
+
+    manifest = {
+        "format_version": CATALOG_FORMAT_VERSION,
+        "version": catalog.version,
+        "updated_at": catalog.updated_at,
+        "size": len(catalog),
+        "values": {
+            "categories": list(columns.categories),
+            "regions": list(columns.regions),
+            "age_ranges": list(columns.age_ranges),
+            "platforms": list(columns.platforms),
+            "sources": list(catalog.sources.values),
+        },
+    }
+    with open(os.path.join(staging, "manifest.json"), "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle)
+
+    path = os.path.join(directory, name)
+    os.rename(staging, path)
+    pointer = os.path.join(directory, f".CURRENT.{uuid4().hex[:8]}")
+    with open(pointer, "w", encoding="utf-8") as handle:
+        handle.write(name)
+    os.replace(pointer, os.path.join(directory, "CURRENT"))
+    _prune_snapshots(directory, keep=name)
+    logger.info(
+        "catalog.snapshot.saved path=%s version=%s size=%s", path, catalog.version, len(catalog)
+    )
+    return path
+
+
+def load_catalog(directory: str | None = None, newer_than: int = -1) -> InfluencerCatalog | None:
+    """Open the current snapshot in ``directory`` memory-mapped, or return None.
+
+    Also None when the snapshot's version is not above ``newer_than``, which
+    is checked before any array is opened.
+    """
+    current = _current_snapshot(directory or CATALOG_DIR)
+    if current is None:
+        return None
+    path, manifest = current
+    if manifest.get("format_version") != CATALOG_FORMAT_VERSION:
+        logger.warning("catalog.snapshot.incompatible path=%s manifest=%s", path, manifest)
+        return None
+    if manifest["version"] <= newer_than:
+        return None
+
+    values = {key: tuple(manifest["values"][key]) for key in _CODED_COLUMNS}
+    codes = {key: _load_array(path, name) for key, name in _CODED_COLUMNS.items()}
+    strings = {
+        key: StringColumn(_load_array(path, f"{key}.blob"), _load_array(path, f"{key}.offsets"))
+        for key in _STRING_COLUMNS
+    }
+    numeric = {key: _load_array(path, key) for key in _NUMERIC_COLUMNS}
+    rows = CatalogRows(
+        columns=InfluencerColumns(
+            ids=strings["ids"],
+            categories=values["categories"],
+            category_keys=tuple(category.lower() for category in values["categories"]),
+            category_codes=codes["categories"],
+            regions=values["regions"],
+            region_codes=codes["regions"],
+            age_ranges=values["age_ranges"],
+            age_codes=codes["age_ranges"],
+            platforms=values["platforms"],
+            platform_codes=codes["platforms"],
+            engagement=numeric["engagement"],
+            stats_updated_us=numeric["stats_updated_us"],
+        ),
+        names=strings["names"],
+        bios=strings["bios"],
+        languages=strings["languages"],
+        sources=InternedColumn(values["sources"], codes["sources"]),
+        followers=numeric["followers"],
+        last_crawled_us=numeric["last_crawled_us"],
+        content_hashes=numeric["content_hashes"],
+    )
+    return build_catalog(rows, manifest["version"], updated_at=manifest["updated_at"])
+
+
+def _current_snapshot(directory: str | None) -> Tuple[str, Dict[str, Any]] | None:
+    if not directory:
+        return None
+    try:
+        with open(os.path.join(directory, "CURRENT"), encoding="utf-8") as handle:
+            path = os.path.join(directory, handle.read().strip())
+        with open(os.path.join(path, "manifest.json"), encoding="utf-8") as handle:
+            return path, json.load(handle)
+    except FileNotFoundError:
+        return None
+
+
+def _load_array(path: str, name: str) -> np.ndarray:
+    filename = os.path.join(path, f"{name}.npy")
+    try:
+        return np.load(filename, mmap_mode="r")
+    except ValueError:
+        # Zero-length arrays cannot be memory-mapped.
+        return np.load(filename)
+
+
+def _prune_snapshots(directory: str, keep: str) -> None:
+    snapshots = sorted(
+        entry
+        for entry in os.listdir(directory)
+        if entry.startswith(f"v{CATALOG_FORMAT_VERSION}-") and entry != keep
+    )
+    for entry in snapshots[: max(len(snapshots) - (CATALOG_KEEP - 1), 0)]:
+        # Workers that still map the old files keep them alive until they reload.
+        shutil.rmtree(os.path.join(directory, entry), ignore_errors=True)
+
+
+def _initial_catalog() -> InfluencerCatalog:
+    try:
+        loaded = load_catalog()
+    except Exception:
+        logger.exception("catalog.snapshot.load_failed dir=%s", CATALOG_DIR)
+        loaded = None
+    if loaded is not None:
+        logger.info("catalog.snapshot.loaded version=%s size=%s", loaded.version, len(loaded))
+        return loaded
+    return build_catalog(CatalogBuilder().finish(), 0)
+
+
+_WRITE_LOCK = threading.Lock()
+_CATALOG = _initial_catalog()
+observability.register_gauge(
+    "catalog_influencers", "Influencers in the published catalog.", lambda: len(_CATALOG)
+)
+observability.register_gauge(
+    "catalog_version", "Version of the published catalog.", lambda: _CATALOG.version
+)
+
+
+def get_catalog() -> InfluencerCatalog:
+    """Return the currently published catalog snapshot."""
+    return _CATALOG
+
+
+def replace_catalog(influencers: Iterable[Influencer] | CatalogRows) -> InfluencerCatalog:
+    """Publish ``influencers`` as the new catalog and return the snapshot."""
+    global _CATALOG
+    if not isinstance(influencers, CatalogRows):
+        builder = CatalogBuilder()
+        builder.extend(influencers)
+        influencers = builder.finish()
+    with _WRITE_LOCK:
+        catalog = build_catalog(influencers, _CATALOG.version + 1)
+        _CATALOG = catalog
+    logger.info("catalog.published version=%s size=%s", catalog.version, len(catalog))
+    return catalog
+
+
+def reload_catalog() -> bool:
+    """Publish the on-disk snapshot if it is newer than the in-memory catalog."""
+    global _CATALOG
+    with _WRITE_LOCK:
+        loaded = load_catalog(newer_than=_CATALOG.version)
+        if loaded is None:
+            return False
+        _CATALOG = loaded
+    logger.info("catalog.reloaded version=%s size=%s", loaded.version, len(loaded))
+    return True
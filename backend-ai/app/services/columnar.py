@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+from array import array
+from typing import Dict, Iterable, Iterator, Sequence, Tuple
+
+import numpy as np
+
+# Compact column types shared by the RAG index and the recommender catalog.
+# A Python ``str`` costs ~50 bytes of object header on top of its text and a
+# pydantic model several hundred more per instance; these columns store the
+# text once, packed, and decode values only when a row is actually read.
+
+
+class StringColumn(Sequence[str]):
+    """Immutable strings packed as one UTF-8 blob plus int64 offsets.
+
+    Costs the encoded length + 8 bytes per value. Works over plain or
+    memory-mapped arrays; ``offsets[0]`` is always 0.
+    """
+
+    __slots__ = ("blob", "offsets")
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray) -> None:
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, values: Iterable[str]) -> StringColumn:
+        builder = StringColumnBuilder()
+        for value in values:
+            builder.append(value)
+        return builder.finish()
+
+    @classmethod
+    def concat(cls, columns: Sequence[StringColumn]) -> StringColumn:
+        if len(columns) == 1:
+            return columns[0]
+        parts = [np.zeros(1, dtype=np.int64)]
+        base = 0
+        for column in columns:
+            parts.append(np.asarray(column.offsets[1:], dtype=np.int64) + base)
+            base += int(column.offsets[-1])
+        return cls(
+            np.concatenate([np.asarray(column.blob, dtype=np.uint8) for column in columns]),
+            np.concatenate(parts),
+        )
+
+    def __len__(self) -> int:
+        return self.offsets.shape[0] - 1
+
+    def __getitem__(self, row):  # type: ignore[override]
+        size = len(self)
+        if isinstance(row, slice):
+            return [self[item] for item in range(*row.indices(size))]
+        if row < 0:
+            row += size
+        if not 0 <= row < size:
+            raise IndexError(row)
+        return self.blob[self.offsets[row] : self.offsets[row + 1]].tobytes().decode("utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        blob = self.blob.tobytes()
+        offsets = self.offsets.tolist()
+        for start, end in zip(offsets, offsets[1:]):
+            yield blob[start:end].decode("utf-8")
+
+    def take(self, rows: np.ndarray) -> StringColumn:
+        rows = np.asarray(rows, dtype=np.intp)
+        starts = np.asarray(self.offsets[rows], dtype=np.int64)
+        lengths = np.asarray(self.offsets[rows + 1], dtype=np.int64) - starts
+        offsets = np.zeros(rows.size + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        gather = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return StringColumn(np.asarray(self.blob)[gather], offsets)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.blob.nbytes + self.offsets.nbytes)
+
+
+class StringColumnBuilder:
+    __slots__ = ("_blob", "_offsets")
+
+    def __init__(self) -> None:
+        self._blob = bytearray()
+        self._offsets = array("q", [0])
+
+    def append(self, value: str) -> None:
+        self._blob += value.encode("utf-8")
+        self._offsets.append(len(self._blob))
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def finish(self) -> StringColumn:
+        # The column adopts the buffers without a copy; exporting them also
+        # makes any later append raise BufferError.
+        return StringColumn(
+            np.frombuffer(self._blob, dtype=np.uint8),
+            np.frombuffer(self._offsets, dtype=np.int64),
+        )
+
+
+class InternedColumn(Sequence[str]):
+    """Low-cardinality strings stored as int32 codes into a tuple of values."""
+
+    __slots__ = ("values", "codes")
+
+    def __init__(self, values: Tuple[str, ...], codes: np.ndarray) -> None:
+        self.values = values
+        self.codes = codes
+
+    @classmethod
+    def from_strings(cls, values: Iterable[str]) -> InternedColumn:
+        builder = InternedColumnBuilder()
+        for value in values:
+            builder.append(value)
+        return builder.finish()
+
+    @classmethod
+    def concat(cls, columns: Sequence[InternedColumn]) -> InternedColumn:
+        if len(columns) == 1:
+            return columns[0]
+        lookup: Dict[str, int] = {}
+        parts = []
+        for column in columns:
+            remap = np.array(
+                [lookup.setdefault(value, len(lookup)) for value in column.values],
+                dtype=np.int32,
+            )
+            parts.append(remap[column.codes] if remap.size else column.codes.astype(np.int32))
+        return cls(tuple(lookup), np.concatenate(parts))
+
+    def __len__(self) -> int:
+        return self.codes.shape[0]
+
+    def __getitem__(self, row):  # type: ignore[override]
+        if isinstance(row, slice):
+            return [self.values[code] for code in self.codes[row].tolist()]
+        return self.values[self.codes[row]]
+
+    def __iter__(self) -> Iterator[str]:
+        values = self.values
+        return (values[code] for code in self.codes.tolist())
+
+    def take(self, rows: np.ndarray) -> InternedColumn:
+        return InternedColumn(self.values, self.codes[rows])
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.codes.nbytes)
+
+
+class InternedColumnBuilder:
+    __slots__ = ("_lookup", "_codes")
+
+    def __init__(self) -> None:
+        self._lookup: Dict[str, int] = {}
+        self._codes = array("i")
+
+    def append(self, value: str) -> None:
+        self._codes.append(self._lookup.setdefault(value, len(self._lookup)))
+
+    def finish(self) -> InternedColumn:
+        return InternedColumn(tuple(self._lookup), np.frombuffer(self._codes, dtype=np.int32))
+
+
+class IdIndex:
+    """Exact id -> row lookup over a sorted fixed-width key array.
+
+    Costs the longest id's byte length + 4 bytes per row, instead of a dict
+    of ``str`` keys (~100 bytes per entry). Repeated ids resolve to their
+    first row.
+    """
+
+    __slots__ = ("_keys", "_rows")
+
+    def __init__(self, ids: Iterable[str]) -> None:
+        keys = _fixed_width_keys(ids)
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self._rows = order.astype(np.int32 if keys.size < 2**31 else np.int64)
+
+    def __len__(self) -> int:
+        return self._keys.shape[0]
+
+    def find(self, ids: Sequence[str]) -> np.ndarray:
+        """Row of each id, aligned with ``ids``; -1 where the id is unknown."""
+        found = np.full(len(ids), -1, dtype=np.intp)
+        if not len(ids) or not len(self):
+            return found
+        width = self._keys.dtype.itemsize
+        encoded = [value.encode("utf-8") for value in ids]
+        # Longer ids cannot be present and would be truncated by the cast.
+        fits = np.array([len(value) <= width for value in encoded], dtype=bool)
+        query = np.array(
+            [value if fit else b"" for value, fit in zip(encoded, fits.tolist())],
+            dtype=self._keys.dtype,
+        )
+        positions = np.minimum(np.searchsorted(self._keys, query), len(self) - 1)
+        hit = fits & (self._keys[positions] == query)
+        found[hit] = self._rows[positions[hit]]
+        return found
+
+    def rows(self, ids: Iterable[str]) -> np.ndarray:
+        """Rows for the known ids in request order; unknown and repeated ids are skipped."""
+        found = self.find(list(dict.fromkeys(ids)))
+        return found[found >= 0]
+
+    def dedupe_rows(self, priority: np.ndarray | None = None) -> np.ndarray | None:
+        """Rows to keep so each id appears once, or None when ids are unique.
+
+        Each id keeps the position of its first occurrence and the value of
+        its highest-``priority`` row (ties, or no priority: the last row),
+        so without a priority this matches ``{row.id: row for row in rows}``.
+        """
+        if len(self) < 2:
+            return None
+        boundaries = self._keys[1:] != self._keys[:-1]
+        if boundaries.all():
+            return None
+        firsts = self._rows[np.concatenate(([True], boundaries))]
+        if priority is None:
+            winners = self._rows[np.concatenate((boundaries, [True]))]
+        else:
+            # Order each id's rows by (priority, row); the group's last wins.
+            groups = np.concatenate(([0], np.cumsum(boundaries)))
+            order = np.lexsort((self._rows, priority[self._rows], groups))
+            winners = self._rows[order][np.concatenate((boundaries, [True]))]
+        return winners[np.argsort(firsts, kind="stable")].astype(np.intp)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self._keys.nbytes + self._rows.nbytes)
+
+
+# Ids encoded per chunk when building keys from a StringColumn, bounding the
+# transient bytes objects.
+_KEY_CHUNK = 65536
+
+
+def _fixed_width_keys(ids: Iterable[str]) -> np.ndarray:
+    if not isinstance(ids, StringColumn):
+        return np.array([value.encode("utf-8") for value in ids], dtype=np.bytes_)
+    offsets = np.asarray(ids.offsets)
+    width = int(np.diff(offsets).max(initial=0))
+    keys = np.zeros(len(ids), dtype=f"S{max(width, 1)}")
+    for start in range(0, len(ids), _KEY_CHUNK):
+        stop = min(start + _KEY_CHUNK, len(ids))
+        chunk = ids.blob[offsets[start] : offsets[stop]].tobytes()
+        bounds = (offsets[start : stop + 1] - offsets[start]).tolist()
+        keys[start:stop] = [chunk[begin:end] for begin, end in zip(bounds, bounds[1:])]
+    return keys
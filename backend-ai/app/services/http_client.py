@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Coroutine, Dict, TypeVar
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+LLM_BASE_URL = os.environ.get("OPENAI_BASE_URL", "https://api.openai.com/v1")
+LLM_MAX_CONNECTIONS = int(os.environ.get("LLM_MAX_CONNECTIONS", "20"))
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "2"))
+LLM_BACKOFF_S = float(os.environ.get("LLM_BACKOFF_S", "0.25"))
+LLM_DEFAULT_DEADLINE_S = float(os.environ.get("LLM_DEFAULT_DEADLINE_S", "30"))
+
+_RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class LLMRequestError(Exception):
+    """Raised when an LLM API call fails after all retries or its deadline."""
+
+
+class AsyncLLMClient:
+    """Keep-alive, connection-pooled JSON client for the chat-completions API.
+
+    One ``httpx.AsyncClient`` and concurrency semaphore are kept per event
+    loop, so the uvicorn loop and the background loop used by sync callers
+    each reuse their own pool. Every call has an overall deadline covering
+    all retries.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        max_connections: int,
+        max_concurrency: int,
+        max_retries: int,
+        backoff_s: float,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.max_connections = max_connections
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max(0, max_retries)
+        self.backoff_s = backoff_s
+        # One pool per event loop (request loop, run_sync's loop); guarded
+        # because each loop's thread reads and prunes the shared dict.
+        self._pools: Dict[
+            asyncio.AbstractEventLoop, tuple[httpx.AsyncClient, asyncio.Semaphore]
+        ] = {}
+        self._pools_lock = threading.Lock()
+
+    async def post_json(
+        self,
+        path: str,
+        payload: Dict[str, Any],
+        api_key: str,
+        deadline_s: float | None = None,
+    ) -> Dict[str, Any]:
+        deadline_s = deadline_s or LLM_DEFAULT_DEADLINE_S
+        try:
+            return await asyncio.wait_for(
+                self._post_with_retries(path, payload, api_key, time.monotonic() + deadline_s),
+                timeout=deadline_s,
+            )
+        except asyncio.TimeoutError as exc:
+            raise LLMRequestError(f"POST {path} exceeded {deadline_s}s deadline") from exc
+
+    async def aclose(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._pools_lock:
+            pool = self._pools.pop(loop, None)
+        if pool is not None:
+            await pool[0].aclose()
+
+    async def _post_with_retries(
+        self, path: str, payload: Dict[str, Any], api_key: str, deadline: float
+    ) -> Dict[str, Any]:
+        client, semaphore = self._pool()
+        headers = {"Authorization": f"Bearer {api_key}"}
+        attempt = 0
+        while True:
+            retry_after: float | None = None
+            async with semaphore:
+                remaining = max(deadline - time.monotonic(), 0.001)
+                try:
+                    response = await client.post(
+                        path, json=payload, headers=headers, timeout=remaining
+                    )
+                except httpx.TransportError as exc:
+                    error: Exception = exc
+                else:
+                    if response.status_code < 400:
+                        return response.json()
+                    error = LLMRequestError(
+                        f"POST {path} returned {response.status_code}: {response.text[:200]}"
+                    )
+                    if response.status_code not in _RETRYABLE_STATUS:
+                        raise error
+                    retry_after = _retry_after_s(response)
+
+            if attempt >= self.max_retries:
+                raise LLMRequestError(f"POST {path} failed after {attempt + 1} attempts") from error
+            delay = retry_after if retry_after is not None else self._backoff(attempt)
+            if time.monotonic() + delay >= deadline:
+                raise LLMRequestError(f"POST {path} has no time left to retry") from error
+            logger.info(
+                "llm.retry path=%s attempt=%s delay_s=%.2f error=%s",
+                path,
+                attempt + 1,
+                delay,
+                error,
+            )
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def _backoff(self, attempt: int) -> float:
+        # Exponential backoff with full jitter.
+        return random.uniform(0, self.backoff_s * (2**attempt))
+
+    def _pool(self) -> tuple[httpx.AsyncClient, asyncio.Semaphore]:
+        loop = asyncio.get_running_loop()
+        with self._pools_lock:
+            pool = self._pools.get(loop)
+            if pool is None:
+                for stale in [other for other in self._pools if other.is_closed()]:
+                    del self._pools[stale]
+                client = httpx.AsyncClient(
+                    base_url=self.base_url,
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections,
+                    ),
+                )
+                pool = (client, asyncio.Semaphore(self.max_concurrency))
+                self._pools[loop] = pool
+            return pool
+
+
+def _retry_after_s(response: httpx.Response) -> float | None:
+    value = response.headers.get("retry-after")
+    try:
+        return max(float(value), 0.0) if value is not None else None
+    except ValueError:
+        return None
+
+
+_CLIENT = AsyncLLMClient(
+    base_url=LLM_BASE_URL,
+    max_connections=LLM_MAX_CONNECTIONS,
+    max_concurrency=LLM_MAX_CONCURRENCY,
+    max_retries=LLM_MAX_RETRIES,
+    backoff_s=LLM_BACKOFF_S,
+)
+
+
+def get_llm_client() -> AsyncLLMClient:
+    return _CLIENT
+
+
+async def chat_completion(
+    payload: Dict[str, Any], api_key: str, deadline_s: float | None = None
+) -> Dict[str, Any]:
+    return await _CLIENT.post_json("/chat/completions", payload, api_key, deadline_s)
+
+
+# --------- SYNC BRIDGE ---------
+#
+# Sync code paths (threadpool routes, CLIs) submit coroutines to one
+# long-lived background loop instead of calling asyncio.run per request,
+# so they also get keep-alive connections.
+
+_SYNC_LOOP: asyncio.AbstractEventLoop | None = None
+_SYNC_LOOP_LOCK = threading.Lock()
+
+
+def run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """Run ``coro`` on the shared background loop and wait for its result."""
+    future: Future[T] = asyncio.run_coroutine_threadsafe(coro, _sync_loop())
+    return future.result()
+
+
+def _sync_loop() -> asyncio.AbstractEventLoop:
+    global _SYNC_LOOP
+    with _SYNC_LOOP_LOCK:
+        if _SYNC_LOOP is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="llm-http-loop", daemon=True).start()
+            _SYNC_LOOP = loop
+        return _SYNC_LOOP
@@ -1,75 +1,448 @@
 from __future__ import annotations
 
 import csv
+import glob
+import gzip
+import hashlib
+import itertools
+import logging
+import multiprocessing
 import os
-import threading
 import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
 from datetime import datetime, timezone
-from typing import List
+from typing import IO, Callable, Dict, Iterable, Iterator, List, Tuple, TypeVar
+
+import numpy as np
 
 from app.models.schemas import Influencer
-from app.services import rag
+from app.services import catalog, rag, recommender
+from app.services.columnar import InternedColumn
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Profiles validated and appended to the catalog per batch; bounds the live
+# Influencer models and sets how often progress is reported.
+CHUNK_ROWS = int(os.environ.get("INGESTION_CHUNK_ROWS", "10000"))
+# Processes parsing CSV shards when INGESTION_CSV_PATH names several files;
+# 0 or 1 parses them in-process, one after another.
+WORKERS = int(os.environ.get("INGESTION_WORKERS", str(os.cpu_count() or 1)))
+# Bad rows logged individually per run (per worker when parallel); the rest
+# are only counted.
+_BAD_ROW_LOG_LIMIT = 20
+_CSV_SUFFIXES = (".csv", ".csv.gz")
+# CSV columns that feed a row's content hash, in a fixed order.
+_PROFILE_FIELDS = tuple(Influencer.model_fields)
 
 LAST_RUN_AT: str | None = None
 LAST_ERROR: str | None = None
+# Rows inserted, updated or deleted in the catalog by the last run.
 LAST_RECORDS_UPDATED: int = 0
+# Progress of the current (or last) run, updated after every chunk.
+LAST_ROWS_READ: int = 0
+LAST_BAD_ROWS: int = 0
+LAST_ROWS_PER_S: float = 0.0
+LAST_DURATION_S: float | None = None
+# Delta accounting of the last run.
+LAST_SOURCES_SKIPPED: int = 0
+LAST_SOURCES_CHANGED: int = 0
+LAST_ROWS_SKIPPED: int = 0
+LAST_ROWS_INSERTED: int = 0
+LAST_ROWS_UPDATED: int = 0
+LAST_ROWS_DELETED: int = 0
+
+
+@dataclass(frozen=True)
+class _SourceFingerprint:
+    size: int
+    mtime_ns: int
+    sha256: str
+
+
+@dataclass(frozen=True)
+class _SourceResult:
+    path: str
+    fingerprint: _SourceFingerprint
+    # None when the source is unchanged since the last run and was not read.
+    rows: catalog.CatalogRows | None
+    bad_rows: int
+
+
+@dataclass(frozen=True)
+class _LoadedSources:
+    """What the last successful CSV run staged, so the next one can skip unchanged sources."""
+
+    fingerprints: Dict[str, _SourceFingerprint]
+    # Each source's slice of ``rows``.
+    ranges: Dict[str, Tuple[int, int]]
+    # Every source's rows in source order, before deduplication.
+    rows: catalog.CatalogRows
+
+
+_LOADED: _LoadedSources | None = None
 
 
 def run_ingestion() -> int:
+    """Load profiles into a new catalog and RAG index; return the rows changed.
+
+    Rows flow reader -> validation -> catalog columns a chunk at a time,
+    without a full list of models ever existing; rows that fail to parse or
+    validate are counted in LAST_BAD_ROWS and skipped. Several CSV shards
+    are parsed in parallel and merged, keeping the newest
+    ``stats_updated_at`` per influencer id.
+
+    Runs are incremental: sources whose size, mtime or content hash match
+    the last run are not read again, nothing is published when no source
+    changed, and the RAG index only re-vectorizes inserted/updated rows.
+    """
     global LAST_RUN_AT, LAST_ERROR, LAST_RECORDS_UPDATED
+    global LAST_ROWS_READ, LAST_BAD_ROWS, LAST_ROWS_PER_S, LAST_DURATION_S
+    global LAST_SOURCES_SKIPPED, LAST_SOURCES_CHANGED, LAST_ROWS_SKIPPED
+    global LAST_ROWS_INSERTED, LAST_ROWS_UPDATED, LAST_ROWS_DELETED
     LAST_RUN_AT = datetime.now(timezone.utc).isoformat()
     LAST_ERROR = None
+    LAST_ROWS_READ = LAST_BAD_ROWS = 0
+    LAST_ROWS_PER_S = 0.0
+    LAST_DURATION_S = None
+    LAST_SOURCES_SKIPPED = LAST_SOURCES_CHANGED = LAST_ROWS_SKIPPED = 0
+    LAST_ROWS_INSERTED = LAST_ROWS_UPDATED = LAST_ROWS_DELETED = 0
+    started = time.perf_counter()
+    sources: List[str] = []
 
     try:
-        profiles = _load_profiles()
-        docs = [
-            rag.InfluencerDoc(
-                id=profile.id,
-                name=profile.name,
-                bio=profile.bio,
-                category=profile.category,
-                region=profile.region,
-            )
-            for profile in profiles
-        ]
-        rag.refresh_documents(docs)
-        LAST_RECORDS_UPDATED = len(docs)
+        sources = _csv_sources(os.environ.get("INGESTION_CSV_PATH"))
+        if sources:
+            LAST_RECORDS_UPDATED = _ingest_sources(sources, started)
+        else:
+            LAST_RECORDS_UPDATED = _ingest_mock(started)
         return LAST_RECORDS_UPDATED
     except Exception as exc:
         LAST_ERROR = str(exc)
         raise
+    finally:
+        LAST_DURATION_S = round(time.perf_counter() - started, 3)
+        LAST_ROWS_PER_S = round(LAST_ROWS_READ / max(LAST_DURATION_S, 1e-9), 1)
+        logger.info(
+            "ingestion.finished files=%s skipped_files=%s rows=%s bad_rows=%s "
+            "skipped_rows=%s changed_rows=%s rows_per_s=%s duration_s=%s",
+            len(sources),
+            LAST_SOURCES_SKIPPED,
+            LAST_ROWS_READ,
+            LAST_BAD_ROWS,
+            LAST_ROWS_SKIPPED,
+            LAST_RECORDS_UPDATED,
+            LAST_ROWS_PER_S,
+            LAST_DURATION_S,
+        )
 
 
-def schedule_daily_ingestion(interval_hours: int = 24) -> None:
-    def _worker() -> None:
-        while True:
-            run_ingestion()
-            time.sleep(interval_hours * 3600)
+def last_run_status() -> Dict[str, object]:
+    """The LAST_* fields of this process as the ingestion status payload."""
+    return {
+        "last_run_at": LAST_RUN_AT,
+        "records_updated": LAST_RECORDS_UPDATED,
+        "rows_read": LAST_ROWS_READ,
+        "bad_rows": LAST_BAD_ROWS,
+        "rows_per_s": LAST_ROWS_PER_S,
+        "duration_s": LAST_DURATION_S,
+        "sources_skipped": LAST_SOURCES_SKIPPED,
+        "sources_changed": LAST_SOURCES_CHANGED,
+        "rows_skipped": LAST_ROWS_SKIPPED,
+        "rows_changed": LAST_RECORDS_UPDATED,
+        "rows_inserted": LAST_ROWS_INSERTED,
+        "rows_updated": LAST_ROWS_UPDATED,
+        "rows_deleted": LAST_ROWS_DELETED,
+        "last_error": LAST_ERROR,
+    }
+
+
+def _ingest_sources(sources: List[str], started: float) -> int:
+    global _LOADED, LAST_SOURCES_SKIPPED, LAST_SOURCES_CHANGED, LAST_ROWS_SKIPPED
+    loaded = _LOADED
+    known = loaded.fingerprints if loaded is not None else {}
+    if len(sources) > 1 and WORKERS > 1:
+        results = _parse_parallel(sources, known, started)
+    else:
+        results = _parse_serial(sources, known, started)
+
+    removed = known.keys() - set(sources)
+    LAST_SOURCES_CHANGED = sum(result.rows is not None for result in results) + len(removed)
+    LAST_SOURCES_SKIPPED = len(results) - (LAST_SOURCES_CHANGED - len(removed))
+    if loaded is not None and not LAST_SOURCES_CHANGED:
+        # Touched files hashed this run keep their new size and mtime, so the
+        # next run skips them on stat alone.
+        _LOADED = replace(
+            loaded, fingerprints={result.path: result.fingerprint for result in results}
+        )
+        LAST_ROWS_SKIPPED = len(loaded.rows)
+        return 0
+
+    parts: List[catalog.CatalogRows] = []
+    ranges: Dict[str, Tuple[int, int]] = {}
+    start = 0
+    for result in results:
+        part = result.rows
+        if part is None:
+            part = loaded.rows.take(np.arange(*loaded.ranges[result.path]))
+            LAST_ROWS_SKIPPED += len(part)
+        ranges[result.path] = (start, start + len(part))
+        start += len(part)
+        parts.append(part)
+    rows = catalog.CatalogRows.concat(parts)
+    if not len(rows) and LAST_BAD_ROWS:
+        raise ValueError(f"No valid rows to ingest ({LAST_BAD_ROWS} bad rows)")
+
+    changed = _publish(rows, incremental=loaded is not None)
+    _LOADED = _LoadedSources(
+        fingerprints={result.path: result.fingerprint for result in results},
+        ranges=ranges,
+        rows=rows,
+    )
+    return changed
+
+
+def _ingest_mock(started: float) -> int:
+    global _LOADED
+    builder = catalog.CatalogBuilder()
+    builder.extend(_mock_profiles())
+    _record_progress(len(builder), started)
+    _LOADED = None
+    return _publish(builder.finish(), incremental=False)
+
+
+def _publish(rows: catalog.CatalogRows, incremental: bool) -> int:
+    """Publish ``rows`` as the catalog, bring the RAG index in line, return rows changed.
+
+    ``incremental`` passes only the changed docs to the RAG index; otherwise
+    it compares every doc, as on the first run after boot.
+    """
+    global LAST_ROWS_INSERTED, LAST_ROWS_UPDATED, LAST_ROWS_DELETED
+    previous = catalog.get_catalog()
+    snapshot = catalog.replace_catalog(rows)
+    recommender.invalidate_cache()
+
+    inserted, updated, updated_previous, deleted = _diff(previous, snapshot)
+    LAST_ROWS_INSERTED, LAST_ROWS_UPDATED, LAST_ROWS_DELETED = (
+        inserted.size,
+        updated.size,
+        deleted.size,
+    )
+    docs = _rag_docs(snapshot)
+    if incremental:
+        previous_docs = _rag_docs(previous)
+        # Stats-only updates leave the searchable text alone.
+        edited = [
+            row
+            for row, previous_row in zip(updated.tolist(), updated_previous.tolist())
+            if docs[row] != previous_docs[previous_row]
+        ]
+        rag.apply_document_changes(
+            docs.take(np.concatenate([inserted, np.asarray(edited, dtype=np.intp)])),
+            previous.columns.ids.take(deleted),
+        )
+    else:
+        rag.refresh_documents(docs)
+    # Save the compacted index, not the one waiting on fresh IDF and norms.
+    rag.wait_for_compaction()
+    catalog.save_catalog(snapshot)
+    rag.save_index()
+    return int(inserted.size + updated.size + deleted.size)
 
-    thread = threading.Thread(target=_worker, daemon=True)
-    thread.start()
 
+def _diff(
+    previous: catalog.InfluencerCatalog, current: catalog.InfluencerCatalog
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Compare two catalogs by id and content hash.
 
-def _load_profiles() -> List[Influencer]:
-    csv_path = os.environ.get("INGESTION_CSV_PATH")
-    if csv_path and os.path.exists(csv_path):
-        return _load_csv_profiles(csv_path)
-    return _mock_profiles()
+    Returns rows of ``current`` that are new, rows of ``current`` whose
+    content changed with their rows in ``previous``, and rows of
+    ``previous`` that are gone. A zero (unknown) hash always counts as changed.
+    """
+    matches = previous.id_index.find(current.columns.ids)
+    known = matches >= 0
+    old_hashes = previous.content_hashes[matches[known]]
+    new_hashes = current.content_hashes[known]
+    changed = np.zeros(len(current), dtype=bool)
+    changed[known] = (old_hashes != new_hashes) | (old_hashes == 0) | (new_hashes == 0)
+    updated = np.flatnonzero(changed)
+    present = np.zeros(len(previous), dtype=bool)
+    present[matches[known]] = True
+    return np.flatnonzero(~known), updated, matches[updated], np.flatnonzero(~present)
 
 
-def _load_csv_profiles(path: str) -> List[Influencer]:
-    profiles: List[Influencer] = []
-    with open(path, newline="", encoding="utf-8") as handle:
+def _parse_serial(
+    sources: List[str], known: Dict[str, _SourceFingerprint], started: float
+) -> List[_SourceResult]:
+    results: List[_SourceResult] = []
+    parsed_rows = 0
+
+    def on_chunk(rows: int) -> None:
+        _record_progress(parsed_rows + rows, started)
+
+    for path in sources:
+        result = _parse_source(path, known.get(path), on_chunk)
+        results.append(result)
+        if result.rows is not None:
+            parsed_rows += len(result.rows)
+    return results
+
+
+def _parse_parallel(
+    sources: List[str], known: Dict[str, _SourceFingerprint], started: float
+) -> List[_SourceResult]:
+    """Check and parse each source in a worker process; results keep source order."""
+    global LAST_BAD_ROWS
+    results: List[_SourceResult] = []
+    parsed_rows = 0
+    # spawn: forking a threaded server process is unsafe.
+    with ProcessPoolExecutor(
+        max_workers=min(WORKERS, len(sources)),
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as pool:
+        for result in pool.map(_parse_source, sources, [known.get(path) for path in sources]):
+            results.append(result)
+            if result.rows is not None:
+                parsed_rows += len(result.rows)
+            LAST_BAD_ROWS += result.bad_rows
+            _record_progress(parsed_rows, started)
+    return results
+
+
+def _parse_source(
+    path: str,
+    known: _SourceFingerprint | None,
+    on_chunk: Callable[[int], None] | None = None,
+) -> _SourceResult:
+    """Parse one CSV source into packed rows, unless it matches ``known``.
+
+    Size and mtime are checked first; only when they differ is the file
+    hashed, so a touched but identical file is still skipped. Runs in pool
+    workers, where ``bad_rows`` is how the parent learns the count.
+    """
+    stat = os.stat(path)
+    if known is not None and (stat.st_size, stat.st_mtime_ns) == (known.size, known.mtime_ns):
+        return _SourceResult(path, known, None, 0)
+    fingerprint = _SourceFingerprint(stat.st_size, stat.st_mtime_ns, _file_sha256(path))
+    if known is not None and fingerprint.sha256 == known.sha256:
+        return _SourceResult(path, fingerprint, None, 0)
+
+    bad_rows_before = LAST_BAD_ROWS
+    builder = catalog.CatalogBuilder()
+    for chunk in _chunks(_load_csv_profiles(path), CHUNK_ROWS):
+        for profile, content_hash in chunk:
+            builder.append(profile, content_hash)
+        if on_chunk is not None:
+            on_chunk(len(builder))
+    return _SourceResult(path, fingerprint, builder.finish(), LAST_BAD_ROWS - bad_rows_before)
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        while block := handle.read(1 << 20):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _record_progress(valid_rows: int, started: float) -> None:
+    global LAST_ROWS_READ, LAST_ROWS_PER_S
+    LAST_ROWS_READ = valid_rows + LAST_BAD_ROWS
+    LAST_ROWS_PER_S = round(LAST_ROWS_READ / max(time.perf_counter() - started, 1e-9), 1)
+
+
+def _chunks(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    iterator = iter(items)
+    while chunk := list(itertools.islice(iterator, max(size, 1))):
+        yield chunk
+
+
+def _rag_docs(snapshot: catalog.InfluencerCatalog) -> rag.DocStore:
+    """View the catalog's columns as RAG docs; no strings are copied."""
+    columns = snapshot.columns
+    return rag.DocStore(
+        {
+            "id": columns.ids,
+            "name": snapshot.names,
+            "bio": snapshot.bios,
+            "category": InternedColumn(columns.categories, columns.category_codes),
+            "region": InternedColumn(columns.regions, columns.region_codes),
+        }
+    )
+
+
+def _csv_sources(spec: str | None) -> List[str]:
+    """Files named by ``spec``: one CSV, a directory of shards, or a glob.
+
+    Shards may be gzip-compressed (``.csv.gz``) and are returned sorted, so
+    a run always merges them in the same order.
+    """
+    if not spec:
+        return []
+    if os.path.isdir(spec):
+        return sorted(
+            path
+            for path in glob.glob(os.path.join(spec, "*"))
+            if path.endswith(_CSV_SUFFIXES) and os.path.isfile(path)
+        )
+    if any(char in spec for char in "*?["):
+        return sorted(path for path in glob.glob(spec, recursive=True) if os.path.isfile(path))
+    return [spec] if os.path.exists(spec) else []
+
+
+def _open_csv(path: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", newline="", encoding="utf-8")
+    return open(path, newline="", encoding="utf-8")
+
+
+def _load_csv_profiles(path: str) -> Iterator[Tuple[Influencer, int]]:
+    """Yield (profile, content hash) per valid row of ``path``."""
+    for line, row in _read_csv_rows(path):
+        try:
+            yield _profile_from_row(row), _row_hash(row)
+        except (ValueError, TypeError) as exc:
+            # pydantic's ValidationError is a ValueError.
+            _record_bad_row(path, line, exc)
+
+
+def _row_hash(row: dict) -> int:
+    # Hash the raw values: parsed profiles default a missing last_crawled_at
+    # to "now", which would make every such row look changed on every run.
+    payload = "\x1f".join(str(row.get(field)) for field in _PROFILE_FIELDS)
+    digest = hashlib.blake2b(payload.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def _read_csv_rows(path: str) -> Iterator[Tuple[int, dict]]:
+    with _open_csv(path) as handle:
         reader = csv.DictReader(handle)
-        for row in reader:
-            profiles.append(_profile_from_row(row))
-    return profiles
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as exc:
+                _record_bad_row(path, reader.line_num, exc)
+                continue
+            yield reader.line_num, row
+
+
+def _record_bad_row(path: str, line: int, error: Exception) -> None:
+    global LAST_BAD_ROWS
+    LAST_BAD_ROWS += 1
+    if LAST_BAD_ROWS <= _BAD_ROW_LOG_LIMIT:
+        logger.warning("ingestion.bad_row path=%s line=%s error=%s", path, line, error)
 
 
 def _profile_from_row(row: dict) -> Influencer:
-    now = datetime.now(timezone.utc)
-    stats_updated_at = _parse_datetime(row.get("stats_updated_at")) or now
-    last_crawled_at = _parse_datetime(row.get("last_crawled_at")) or now
+    # A missing stats_updated_at stays None: the catalog keeps the newest
+    # row per id and ranks undated rows oldest, while freshness scoring
+    # already treats them as current.
+    stats_updated_at = _parse_datetime(row.get("stats_updated_at"))
+    last_crawled_at = _parse_datetime(row.get("last_crawled_at")) or datetime.now(timezone.utc)
 
     return Influencer(
         id=row.get("id", "unknown"),
@@ -0,0 +1,350 @@
+from __future__ import annotations
+
+import fcntl
+import json
+import logging
+import multiprocessing
+import os
+import random
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Deque, Dict, List
+
+from app.services import catalog, ingestion, observability, rag, recommender
+
+logger = logging.getLogger(__name__)
+
+# One process per node ingests. Every uvicorn worker runs a scheduler thread
+# that tries a non-blocking flock on <INGESTION_STATE_DIR>/ingestion.lock;
+# the holder (the leader) runs each job in a spawned child process, off the
+# GIL that serves requests. The child publishes catalog and RAG snapshots to
+# CATALOG_DIR / RAG_INDEX_DIR, and every worker, leader included, polls for
+# newer snapshots and hot-loads them. If the leader dies its lock is released
+# and the next follower to poll takes over. Without RAG_INDEX_DIR there is no
+# shared location, so each process ingests for itself on its thread.
+
+INTERVAL_S = float(os.environ.get("INGESTION_INTERVAL_S", str(24 * 3600)))
+# Each run starts up to this much later than scheduled, so pods started
+# together do not all read the sources at the same moment.
+JITTER_S = float(os.environ.get("INGESTION_JITTER_S", "60"))
+# How often followers look for newer snapshots and retry for leadership.
+POLL_S = float(os.environ.get("INGESTION_POLL_S", "30"))
+HISTORY_SIZE = int(os.environ.get("INGESTION_HISTORY_SIZE", "20"))
+STATE_DIR = os.environ.get("INGESTION_STATE_DIR") or rag.INDEX_DIR
+
+_STOP = threading.Event()
+_THREAD: threading.Thread | None = None
+# Open descriptor holding the leader flock; None while following.
+_LOCK_FD: int | None = None
+# Long-lived, so the child keeps the last run's source fingerprints and
+# staged rows, and the next run stays incremental.
+_RUNNER: ProcessPoolExecutor | None = None
+_RUNNER_PID: int | None = None
+_NEXT_RUN_AT: float | None = None
+_RUNNING_SINCE: str | None = None
+# Run history in local mode; shared mode keeps it in the state dir.
+_HISTORY: Deque[Dict[str, object]] = deque(maxlen=HISTORY_SIZE)
+
+
+def latest_run() -> Dict[str, object] | None:
+    """The last finished run on this node, or None before the first one."""
+    runs = history()
+    return runs[-1] if runs else None
+
+
+def shared() -> bool:
+    """Whether runs are published to disk for every worker on the node."""
+    return bool(STATE_DIR and rag.INDEX_DIR and catalog.CATALOG_DIR)
+
+
+def start() -> None:
+    """Start this process's scheduler thread; later calls are no-ops."""
+    global _THREAD
+    if _THREAD is not None:
+        return
+    _STOP.clear()
+    _THREAD = threading.Thread(target=_loop, name="ingestion-scheduler", daemon=True)
+    _THREAD.start()
+
+
+def shutdown() -> None:
+    global _THREAD
+    _STOP.set()
+    _THREAD = None
+    # A run in flight is abandoned; its half-written snapshot never becomes CURRENT.
+    _stop_runner(kill=_RUNNING_SINCE is not None)
+    _release_leadership()
+
+
+def status() -> Dict[str, object]:
+    """Latest run, scheduler state and run history (newest first)."""
+    runs = history()
+    if shared() and runs:
+        latest = runs[-1]
+    else:
+        # Local runs happen in this process, so this includes live progress.
+        latest = ingestion.last_run_status()
+    payload = {key: latest.get(key) for key in ingestion.last_run_status()}
+    payload["scheduler"] = {
+        "mode": "shared" if shared() else "local",
+        "pid": os.getpid(),
+        "leader": _LOCK_FD is not None or not shared(),
+        "leader_pid": _leader_pid() if shared() else os.getpid(),
+        "running_since": _RUNNING_SINCE,
+        "next_run_at": _isoformat(_NEXT_RUN_AT) if _NEXT_RUN_AT is not None else None,
+        "catalog_version": catalog.get_catalog().version,
+        "index_version": rag.get_index().version,
+    }
+    payload["history"] = runs[::-1]
+    return payload
+
+
+def history() -> List[Dict[str, object]]:
+    if not shared():
+        return list(_HISTORY)
+    try:
+        with open(_history_path(), encoding="utf-8") as handle:
+            return json.load(handle)
+    except (FileNotFoundError, ValueError):
+        return []
+
+
+def _loop() -> None:
+    global _NEXT_RUN_AT
+    if shared():
+        logger.info("ingestion.scheduler.started mode=shared state_dir=%s", STATE_DIR)
+    else:
+        logger.info("ingestion.scheduler.started mode=local reason=no_rag_index_dir")
+        _NEXT_RUN_AT = _first_run_at()
+    while not _STOP.is_set():
+        try:
+            if shared():
+                _tick_shared()
+            elif time.time() >= _NEXT_RUN_AT:
+                _run(_run_job)
+        except Exception:
+            logger.exception("ingestion.scheduler.failed")
+        wait = POLL_S
+        if _NEXT_RUN_AT is not None:
+            wait = min(wait, max(_NEXT_RUN_AT - time.time(), 0.0))
+        _STOP.wait(wait)
+
+
+def _tick_shared() -> None:
+    global _NEXT_RUN_AT
+    if _LOCK_FD is None and _acquire_leadership():
+        runs = history()
+        last_run_at = runs[-1].get("last_run_at") if runs else None
+        if last_run_at:
+            # Keep the previous leader's cadence instead of re-running at once.
+            last = datetime.fromisoformat(str(last_run_at)).timestamp()
+            _NEXT_RUN_AT = last + INTERVAL_S + random.uniform(0, JITTER_S)
+        else:
+            _NEXT_RUN_AT = _first_run_at()
+    if _LOCK_FD is not None and time.time() >= _NEXT_RUN_AT:
+        _run(_run_in_child)
+    _hot_load()
+
+
+def _first_run_at() -> float:
+    # Until the first run publishes, recommendations and RAG search have
+    # nothing to serve, so only jitter when a loaded snapshot can cover it.
+    if catalog.get_catalog().version == 0:
+        return time.time()
+    return time.time() + random.uniform(0, JITTER_S)
+
+
+def _run(job: Callable[[], Dict[str, object] | None]) -> None:
+    global _NEXT_RUN_AT, _RUNNING_SINCE
+    _RUNNING_SINCE = _isoformat(time.time())
+    try:
+        run = job()
+    finally:
+        _RUNNING_SINCE = None
+    if run is None:
+        # Abandoned by shutdown; neither a success nor a failure.
+        return
+    run["finished_at"] = _isoformat(time.time())
+    run["leader_pid"] = os.getpid()
+    run["ok"] = run.get("last_error") is None
+    _record(run)
+    _NEXT_RUN_AT = time.time() + INTERVAL_S + random.uniform(0, JITTER_S)
+
+
+def _run_job() -> Dict[str, object]:
+    """One ingestion run; executes in the runner child in shared mode."""
+    try:
+        ingestion.run_ingestion()
+    except Exception:
+        logger.exception("ingestion.failed")
+    return ingestion.last_run_status()
+
+
+def _run_in_child() -> Dict[str, object] | None:
+    global _RUNNER, _RUNNER_PID
+    runner = _RUNNER
+    if runner is None:
+        # spawn: forking a threaded server process is unsafe. The runner
+        # leads its own process group, so shutdown can signal it together
+        # with the parse pool and resource tracker it starts.
+        runner = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=os.setpgrp,
+        )
+        _RUNNER = runner
+        _RUNNER_PID = runner.submit(os.getpid).result()
+    try:
+        return runner.submit(_run_job).result()
+    except Exception as exc:
+        if _STOP.is_set():
+            # shutdown() killed the run; the next leader runs it again.
+            logger.info("ingestion.run.abandoned reason=shutdown")
+            return None
+        # The child died (e.g. OOM-killed); the next run starts a fresh one.
+        logger.exception("ingestion.runner.failed")
+        _stop_runner(kill=False)
+        status = ingestion.last_run_status()
+        status["last_run_at"] = _isoformat(time.time())
+        status["last_error"] = f"{type(exc).__name__}: {exc}"
+        return status
+
+
+def _stop_runner(kill: bool) -> None:
+    global _RUNNER
+    runner, _RUNNER = _RUNNER, None
+    if runner is None:
+        return
+    if kill and _RUNNER_PID is not None:
+        try:
+            os.killpg(_RUNNER_PID, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    # Not wait=False: in a uvicorn worker (itself a multiprocessing child)
+    # that leaves the idle runner blocked on its call queue, and the worker
+    # hangs at exit joining it.
+    runner.shutdown(wait=True, cancel_futures=True)
+
+
+def _hot_load() -> None:
+    if catalog.reload_catalog():
+        recommender.invalidate_cache()
+    rag.reload_index()
+
+
+def _record(run: Dict[str, object]) -> None:
+    logger.info(
+        "ingestion.run.recorded ok=%s rows_changed=%s duration_s=%s",
+        run["ok"],
+        run.get("rows_changed"),
+        run.get("duration_s"),
+    )
+    if not shared():
+        _HISTORY.append(run)
+        return
+    runs = (history() + [run])[-HISTORY_SIZE:]
+    staging = f"{_history_path()}.{os.getpid()}.tmp"
+    with open(staging, "w", encoding="utf-8") as handle:
+        json.dump(runs, handle)
+    os.replace(staging, _history_path())
+
+
+def _acquire_leadership() -> bool:
+    global _LOCK_FD
+    os.makedirs(STATE_DIR, exist_ok=True)
+    fd = os.open(_lock_path(), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return False
+    os.ftruncate(fd, 0)
+    os.write(fd, str(os.getpid()).encode())
+    _LOCK_FD = fd
+    logger.info("ingestion.leader.acquired pid=%s", os.getpid())
+    return True
+
+
+def _release_leadership() -> None:
+    global _LOCK_FD
+    fd, _LOCK_FD = _LOCK_FD, None
+    if fd is not None:
+        # Closing the descriptor drops the flock.
+        os.close(fd)
+
+
+def _leader_pid() -> int | None:
+    try:
+        with open(_lock_path(), encoding="utf-8") as handle:
+            return int(handle.read().strip() or 0) or None
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _lock_path() -> str:
+    return os.path.join(STATE_DIR, "ingestion.lock")
+
+
+def _history_path() -> str:
+    return os.path.join(STATE_DIR, "ingestion-history.json")
+
+
+def _isoformat(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+def _latest_run_value(key: str) -> Callable[[], float | None]:
+    def read() -> float | None:
+        run = latest_run()
+        value = run.get(key) if run is not None else None
+        return None if value is None else float(value)
+
+    return read
+
+
+def _latest_run_timestamp() -> float | None:
+    run = latest_run()
+    if run is None or not run.get("last_run_at"):
+        return None
+    return datetime.fromisoformat(str(run["last_run_at"])).timestamp()
+
+
+observability.register_gauge(
+    "ingestion_last_run_duration_seconds",
+    "Duration of the last finished ingestion run.",
+    _latest_run_value("duration_s"),
+)
+observability.register_gauge(
+    "ingestion_last_run_rows_read",
+    "Rows read by the last finished ingestion run.",
+    _latest_run_value("rows_read"),
+)
+observability.register_gauge(
+    "ingestion_last_run_rows_changed",
+    "Catalog rows inserted, updated or deleted by the last finished ingestion run.",
+    _latest_run_value("rows_changed"),
+)
+observability.register_gauge(
+    "ingestion_last_run_bad_rows",
+    "Rows skipped as unparseable by the last finished ingestion run.",
+    _latest_run_value("bad_rows"),
+)
+observability.register_gauge(
+    "ingestion_last_run_success",
+    "1 when the last finished ingestion run succeeded, else 0.",
+    _latest_run_value("ok"),
+)
+observability.register_gauge(
+    "ingestion_last_run_timestamp_seconds",
+    "Unix time the last finished ingestion run started.",
+    _latest_run_timestamp,
+)
+observability.register_gauge(
+    "ingestion_leader",
+    "1 when this process holds the node's ingestion leader lock.",
+    lambda: float(_LOCK_FD is not None or not shared()),
+)
@@ -1,23 +1,222 @@
 from __future__ import annotations
 
+import math
 import threading
-from typing import Dict, List
+from typing import Callable, Dict, Iterable, List, Protocol, Tuple
+
+import numpy as np
+
+
+class StatsSource(Protocol):
+    def stats(self) -> Dict[str, float]: ...
+
+
+# Log-linear (HDR-style) buckets over integer microseconds: exact below
+# 2 * _SUB_BUCKETS, then _SUB_BUCKETS equal buckets per power of two, so a
+# bucket is never wider than 1/_SUB_BUCKETS (~3%) of the values in it.
+_SUB_BITS = 5
+_SUB_BUCKETS = 1 << _SUB_BITS
+# Values clamp to 2**36 us (~19 hours), which fixes the bucket count.
+_MAX_US = (1 << 36) - 1
+_BUCKETS = ((_MAX_US.bit_length() - _SUB_BITS) << _SUB_BITS) + _SUB_BUCKETS
+PERCENTILES = (50.0, 90.0, 95.0, 99.0, 99.9)
+_SHIFTS = np.maximum((np.arange(_BUCKETS) >> _SUB_BITS) - 1, 0)
+_BUCKET_LOWER_US = (np.arange(_BUCKETS) - (_SHIFTS << _SUB_BITS)) << _SHIFTS
+_BUCKET_MAX_US = _BUCKET_LOWER_US + (1 << _SHIFTS) - 1
+# Upper bounds (seconds) of the exported Prometheus buckets; +Inf is implied.
+PROMETHEUS_BUCKETS_S = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+class LatencyHistogram:
+    """Fixed-memory latency histogram: O(1) record, mergeable, ~3% precision.
+
+    Holds _BUCKETS counters per series however much traffic it sees, where
+    a list of samples grows (or has to be trimmed) with every request.
+    Single-writer: concurrent recorders each keep their own and merge.
+    """
+
+    __slots__ = ("counts", "total_ms", "max_ms")
+
+    def __init__(self) -> None:
+        self.counts = [0] * _BUCKETS
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, latency_ms: float) -> None:
+        value = int(latency_ms * 1000)
+        if value > _MAX_US:
+            value = _MAX_US
+        elif value < 0:
+            value = 0
+        shift = value.bit_length() - _SUB_BITS - 1
+        if shift > 0:
+            value = (shift << _SUB_BITS) + (value >> shift)
+        self.counts[value] += 1
+        self.total_ms += latency_ms
+        if latency_ms > self.max_ms:
+            self.max_ms = latency_ms
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def merge(self, other: LatencyHistogram) -> None:
+        self.counts = np.add(self.counts, other.counts).tolist()
+        self.total_ms += other.total_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+
+    def copy(self) -> LatencyHistogram:
+        clone = LatencyHistogram()
+        # list() is a single C-level copy, so a concurrent record cannot tear it.
+        clone.counts = list(self.counts)
+        clone.total_ms = self.total_ms
+        clone.max_ms = self.max_ms
+        return clone
+
+    def percentiles(self, percentiles: Iterable[float] = PERCENTILES) -> Dict[str, float]:
+        """Nearest-rank percentiles in ms, each reported as its bucket's midpoint."""
+        percentiles = tuple(percentiles)
+        cumulative = np.cumsum(self.counts)
+        count = int(cumulative[-1])
+        if not count:
+            return {_percentile_key(percentile): 0.0 for percentile in percentiles}
+        ranks = np.maximum(np.ceil(np.asarray(percentiles) / 100 * count), 1)
+        buckets = np.searchsorted(cumulative, ranks)
+        midpoints_ms = (_BUCKET_LOWER_US[buckets] + _BUCKET_MAX_US[buckets]) / 2000
+        return {
+            _percentile_key(percentile): round(min(float(midpoint), float(self.max_ms)), 3)
+            for percentile, midpoint in zip(percentiles, midpoints_ms)
+        }
+
+    def cumulative_counts(self, bounds_ms: Iterable[float]) -> List[int]:
+        """Observations at or below each bound, for Prometheus ``le`` buckets.
+
+        A bucket counts toward a bound only when its whole range is at or
+        below it, so a bound that splits a bucket undercounts by at most
+        that bucket (~3% of the bound).
+        """
+        cumulative = np.cumsum(self.counts)
+        positions = np.searchsorted(
+            _BUCKET_MAX_US, np.asarray(list(bounds_ms)) * 1000, side="right"
+        ) - 1
+        return [int(cumulative[position]) if position >= 0 else 0 for position in positions]
+
+    def summary(self) -> Dict[str, float]:
+        count = self.count
+        return {
+            "count": count,
+            "mean": round(self.total_ms / count, 3) if count else 0.0,
+            **self.percentiles(),
+            "max": round(float(self.max_ms), 3),
+        }
+
+
+def _percentile_key(percentile: float) -> str:
+    return f"p{percentile:g}"
+
+
+# Request latencies accumulate per thread with no lock on the hot path: each
+# thread writes only its own (route, status code) -> histogram dict, and a
+# snapshot merges them. A finished thread's series are folded into
+# _RETIRED, so thread churn does not grow the registry.
+_thread_series = threading.local()
+_SERIES: List[Tuple[threading.Thread, Dict[Tuple[str, int], LatencyHistogram]]] = []
+_RETIRED: Dict[Tuple[str, int], LatencyHistogram] = {}
+_series_lock = threading.Lock()
 
 _lock = threading.Lock()
-_request_counts: Dict[str, int] = {}
-_latencies_ms: List[int] = []
 _llm_calls: int = 0
 _llm_errors: int = 0
-_MAX_LATENCIES = 5000
+_caches: Dict[str, StatsSource] = {}
+_gauges: Dict[str, Tuple[str, Callable[[], float | None]]] = {}
 
 
-def record_request(route: str, status_code: int, latency_ms: int) -> None:
-    key = f"{route}:{status_code}"
-    with _lock:
-        _request_counts[key] = _request_counts.get(key, 0) + 1
-        _latencies_ms.append(latency_ms)
-        if len(_latencies_ms) > _MAX_LATENCIES:
-            _latencies_ms.pop(0)
+def record_request(route: str, status_code: int, latency_ms: float) -> None:
+    _record(("request", route, status_code), latency_ms)
+
+
+def record_stage(component: str, stage: str, latency_ms: float) -> None:
+    """Time spent in one stage of a hot path, e.g. ("rag", "vectorize")."""
+    _record(("stage", component, stage), latency_ms)
+
+
+def _record(key: Tuple[str, str, object], latency_ms: float) -> None:
+    try:
+        series = _thread_series.series
+    except AttributeError:
+        series = _thread_series.series = {}
+        with _series_lock:
+            _SERIES.append((threading.current_thread(), series))
+    histogram = series.get(key)
+    if histogram is None:
+        histogram = series[key] = LatencyHistogram()
+    histogram.record(latency_ms)
+
+
+def request_snapshot() -> Tuple[
+    Dict[Tuple[str, int], int], Dict[Tuple[str, str], LatencyHistogram]
+]:
+    """Request counts per (route, status) and latencies per (route, status class)."""
+    counts: Dict[Tuple[str, int], int] = {}
+    latencies: Dict[Tuple[str, str], LatencyHistogram] = {}
+    for (kind, route, status_code), histogram in _merged_series().items():
+        if kind != "request":
+            continue
+        counts[(route, status_code)] = histogram.count
+        _merge_series(latencies, {(route, f"{status_code // 100}xx"): histogram})
+    return counts, latencies
+
+
+def stage_snapshot() -> Dict[Tuple[str, str], LatencyHistogram]:
+    """Latencies per (component, stage)."""
+    return {
+        (component, stage): histogram
+        for (kind, component, stage), histogram in _merged_series().items()
+        if kind == "stage"
+    }
+
+
+def _merged_series() -> Dict[Tuple[str, str, object], LatencyHistogram]:
+    with _series_lock:
+        live = []
+        for thread, series in _SERIES:
+            if thread.is_alive():
+                live.append((thread, series))
+            else:
+                _merge_series(_RETIRED, series)
+        _SERIES[:] = live
+        merged = {key: histogram.copy() for key, histogram in _RETIRED.items()}
+        for _, series in live:
+            _merge_series(merged, series)
+    return merged
+
+
+def _merge_series(into: Dict, series: Dict) -> None:
+    # dict() copies atomically, so the owning thread may keep adding series.
+    for key, histogram in dict(series).items():
+        merged = into.get(key)
+        if merged is None:
+            into[key] = histogram.copy()
+        else:
+            merged.merge(histogram)
 
 
 def record_llm_call(success: bool) -> None:
@@ -28,30 +227,163 @@ def record_llm_call(success: bool) -> None:
             _llm_errors += 1
 
 
+def register_cache(name: str, cache: StatsSource) -> None:
+    """Include ``cache.stats()`` under ``cache.<name>`` in get_metrics()."""
+    with _lock:
+        _caches[name] = cache
+
+
+def register_gauge(name: str, help_text: str, read: Callable[[], float | None]) -> None:
+    """Export ``read()`` as the Prometheus gauge ``name``; None skips the sample."""
+    with _lock:
+        _gauges[name] = (help_text, read)
+
+
 def get_metrics() -> Dict[str, object]:
+    counts, latencies = request_snapshot()
     with _lock:
-        counts = dict(_request_counts)
-        latencies = list(_latencies_ms)
         llm_calls = _llm_calls
         llm_errors = _llm_errors
+        caches = dict(_caches)
 
+    overall = LatencyHistogram()
+    by_route: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for (route, status_class), histogram in sorted(latencies.items()):
+        overall.merge(histogram)
+        by_route.setdefault(route, {})[status_class] = histogram.summary()
+    by_stage: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for (component, stage), histogram in sorted(stage_snapshot().items()):
+        by_stage.setdefault(component, {})[stage] = histogram.summary()
     return {
-        "request_count": counts,
-        "latency_ms": {
-            "p50": _percentile(latencies, 50),
-            "p95": _percentile(latencies, 95),
-        },
+        "request_count": {f"{route}:{status}": count for (route, status), count in counts.items()},
+        "latency_ms": overall.summary(),
+        "latency_ms_by_route": by_route,
+        "stage_latency_ms": by_stage,
         "llm": {
             "calls": llm_calls,
             "errors": llm_errors,
             "error_rate": (llm_errors / llm_calls) if llm_calls else 0.0,
         },
+        "cache": {name: cache.stats() for name, cache in caches.items()},
     }
 
 
-def _percentile(values: List[int], percentile: int) -> float:
-    if not values:
-        return 0.0
-    ordered = sorted(values)
-    k = max(0, min(len(ordered) - 1, int(round((percentile / 100) * (len(ordered) - 1)))))
-    return float(ordered[k])
+# --------- PROMETHEUS EXPOSITION ---------
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+# Cache stats that only ever grow are exported as counters, the rest as gauges.
+_CACHE_COUNTERS = ("hits", "misses", "evictions", "expirations", "errors")
+
+
+def render_prometheus() -> str:
+    """Every metric in the Prometheus text exposition format (0.0.4)."""
+    counts, latencies = request_snapshot()
+    with _lock:
+        llm_calls = _llm_calls
+        llm_errors = _llm_errors
+        caches = dict(_caches)
+        gauges = dict(_gauges)
+
+    lines: List[str] = []
+    _write_family(
+        lines,
+        "http_requests_total",
+        "counter",
+        "Requests served, by route and status code.",
+        [
+            ({"route": route, "status": str(status)}, count)
+            for (route, status), count in sorted(counts.items())
+        ],
+    )
+    _write_histograms(
+        lines,
+        "http_request_duration_seconds",
+        "Request latency, by route and status class.",
+        [
+            ({"route": route, "status_class": status_class}, histogram)
+            for (route, status_class), histogram in sorted(latencies.items())
+        ],
+    )
+    _write_histograms(
+        lines,
+        "stage_duration_seconds",
+        "Time spent per hot-path stage, by component and stage.",
+        [
+            ({"component": component, "stage": stage}, histogram)
+            for (component, stage), histogram in sorted(stage_snapshot().items())
+        ],
+    )
+    _write_family(lines, "llm_calls_total", "counter", "LLM calls made.", [({}, llm_calls)])
+    _write_family(
+        lines, "llm_errors_total", "counter", "LLM calls that failed.", [({}, llm_errors)]
+    )
+
+    cache_samples: Dict[str, List[Tuple[Dict[str, str], float]]] = {}
+    for cache_name, cache in sorted(caches.items()):
+        for stat, value in cache.stats().items():
+            name = f"cache_{stat}_total" if stat in _CACHE_COUNTERS else f"cache_{stat}"
+            cache_samples.setdefault(name, []).append(({"cache": cache_name}, value))
+    for name, samples in sorted(cache_samples.items()):
+        kind = "counter" if name.endswith("_total") else "gauge"
+        _write_family(lines, name, kind, f"Cache {name[6:]}, by cache.", samples)
+
+    for name, (help_text, read) in sorted(gauges.items()):
+        value = read()
+        if value is not None:
+            _write_family(lines, name, "gauge", help_text, [({}, value)])
+    return "\n".join(lines) + "\n"
+
+
+def _write_family(
+    lines: List[str],
+    name: str,
+    kind: str,
+    help_text: str,
+    samples: List[Tuple[Dict[str, str], float]],
+) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+
+def _write_histograms(
+    lines: List[str],
+    name: str,
+    help_text: str,
+    series: List[Tuple[Dict[str, str], LatencyHistogram]],
+) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    bounds_ms = [bound * 1000 for bound in PROMETHEUS_BUCKETS_S]
+    for labels, histogram in series:
+        count = histogram.count
+        cumulative = histogram.cumulative_counts(bounds_ms)
+        for bound, observed in zip(PROMETHEUS_BUCKETS_S, cumulative):
+            bucket_labels = _format_labels({**labels, "le": _format_value(bound)})
+            lines.append(f"{name}_bucket{bucket_labels} {observed}")
+        lines.append(f"{name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {count}")
+        total_s = _format_value(histogram.total_ms / 1000)
+        lines.append(f"{name}_sum{_format_labels(labels)} {total_s}")
+        lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels.items())
+    return f"{{{pairs}}}"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, int):
+        return str(int(value))
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value))
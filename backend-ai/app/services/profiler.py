@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import functools
+import marshal
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from types import CodeType
+from typing import Dict, Iterator, List, Set, Tuple
+
+# Wall-clock sampling of every Python thread in this process: each tick
+# snapshots sys._current_frames(), so nothing is instrumented and the
+# sampled threads never stop. Only this process is covered; in shared
+# ingestion mode the run itself executes in the leader's runner child.
+
+# Unset disables the admin profile endpoint.
+TOKEN = os.environ.get("PROFILER_TOKEN") or None
+MAX_SECONDS = float(os.environ.get("PROFILER_MAX_SECONDS", "30"))
+INTERVAL_MS = float(os.environ.get("PROFILER_INTERVAL_MS", "10"))
+# Always-on sampler rate; 0 disables it.
+BACKGROUND_HZ = float(os.environ.get("PROFILER_BACKGROUND_HZ", "0"))
+TOP_FRAMES = int(os.environ.get("PROFILER_TOP_FRAMES", "20"))
+
+# Leaf frames of threads parked on a lock or selector. Dropped unless idle
+# samples are asked for, so pool workers and the event loop waiting for
+# work do not drown out the threads using CPU.
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("connection.py", "wait"),
+    ("queue.py", "get"),
+}
+
+Stack = Tuple[CodeType, ...]
+
+_PROFILE_LOCK = threading.Lock()
+_STOP = threading.Event()
+_THREAD: threading.Thread | None = None
+_background_lock = threading.Lock()
+# Background samples: leaf code -> samples, and code -> samples with it on the stack.
+_SELF: Counter[CodeType] = Counter()
+_TOTAL: Counter[CodeType] = Counter()
+_background_samples = 0
+# Threads currently sampling, left out of every profile.
+_SAMPLERS: Set[int] = set()
+
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when an on-demand profile is requested while another is running."""
+
+
+@dataclass(frozen=True)
+class Profile:
+    """Samples of one on-demand profile, keyed by (thread name, root-to-leaf stack)."""
+
+    samples: Counter[Tuple[str, Stack]]
+    ticks: int
+    interval_s: float
+    duration_s: float
+
+    def collapsed(self) -> str:
+        """Folded stacks (``thread;root;...;leaf count``), as read by flamegraph tools."""
+        lines = [
+            ";".join([thread, *(frame_label(code) for code in stack)]) + f" {count}"
+            for (thread, stack), count in self.samples.most_common()
+        ]
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def pstats_dump(self) -> bytes:
+        """The samples as a marshalled pstats table, loadable with pstats.Stats(path).
+
+        Call counts are sample counts and times are samples x interval, so
+        tottime is time on top of the stack and cumtime time anywhere on it.
+        Raises ValueError without samples, as pstats rejects an empty table.
+        """
+        if not self.samples:
+            raise ValueError("The profile captured no samples")
+        stats: Dict[Tuple[str, int, str], list] = {}
+
+        def entry(code: CodeType) -> list:
+            key = _pstats_key(code)
+            if key not in stats:
+                stats[key] = [0, 0, 0.0, 0.0, {}]
+            return stats[key]
+
+        for (_, stack), count in self.samples.items():
+            seconds = count * self.interval_s
+            leaf = entry(stack[-1])
+            leaf[2] += seconds
+            for code in set(stack):
+                item = entry(code)
+                item[0] += count
+                item[1] += count
+                item[3] += seconds
+            for caller, callee in zip(stack, stack[1:]):
+                callers = entry(callee)[4]
+                key = _pstats_key(caller)
+                callers[key] = callers.get(key, 0) + count
+        return marshal.dumps({key: tuple(value) for key, value in stats.items()})
+
+
+def sample(
+    seconds: float, interval_ms: float = INTERVAL_MS, include_idle: bool = False
+) -> Profile:
+    """Sample every other thread for ``seconds``; one profile runs at a time."""
+    if not _PROFILE_LOCK.acquire(blocking=False):
+        raise ProfilerBusyError("A profile is already running in this process")
+    try:
+        interval_s = interval_ms / 1000
+        samples: Counter[Tuple[str, Stack]] = Counter()
+        ticks = 0
+        own = threading.get_ident()
+        _SAMPLERS.add(own)
+        started = time.perf_counter()
+        deadline = started + seconds
+        next_tick = started
+        while next_tick < deadline:
+            samples.update(_stacks(include_idle))
+            ticks += 1
+            next_tick += interval_s
+            time.sleep(max(next_tick - time.perf_counter(), 0.0))
+        return Profile(samples, ticks, interval_s, time.perf_counter() - started)
+    finally:
+        _SAMPLERS.discard(own)
+        _PROFILE_LOCK.release()
+
+
+def start() -> None:
+    """Start the always-on sampler when PROFILER_BACKGROUND_HZ > 0; later calls are no-ops."""
+    global _THREAD
+    if BACKGROUND_HZ <= 0 or _THREAD is not None:
+        return
+    _STOP.clear()
+    _THREAD = threading.Thread(target=_background_loop, name="profiler-sampler", daemon=True)
+    _THREAD.start()
+
+
+def shutdown() -> None:
+    global _THREAD
+    _STOP.set()
+    _THREAD = None
+
+
+def top_frames(limit: int = TOP_FRAMES) -> Dict[str, object] | None:
+    """Busiest frames seen by the always-on sampler, or None when it is off.
+
+    ``self`` counts samples with the frame on top of a thread's stack,
+    ``total`` samples with it anywhere on the stack.
+    """
+    if BACKGROUND_HZ <= 0:
+        return None
+    with _background_lock:
+        samples = _background_samples
+        leaves = _SELF.most_common(limit)
+        totals = dict(_TOTAL)
+    return {
+        "hz": BACKGROUND_HZ,
+        "samples": samples,
+        "top_frames": [
+            {
+                "frame": frame_label(code),
+                "self": count,
+                "self_share": count / samples if samples else 0.0,
+                "total": totals.get(code, 0),
+            }
+            for code, count in leaves
+        ],
+    }
+
+
+def frame_label(code: CodeType) -> str:
+    return f"{code.co_qualname} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _background_loop() -> None:
+    global _background_samples
+    _SAMPLERS.add(threading.get_ident())
+    interval_s = 1 / BACKGROUND_HZ
+    while not _STOP.wait(interval_s):
+        stacks = list(_stacks(include_idle=False))
+        with _background_lock:
+            for _, stack in stacks:
+                _background_samples += 1
+                _SELF[stack[-1]] += 1
+                _TOTAL.update(set(stack))
+
+
+def _stacks(include_idle: bool) -> Iterator[Tuple[str, Stack]]:
+    """(thread name, root-to-leaf code objects) of every thread but the samplers."""
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    for ident, frame in sys._current_frames().items():
+        if ident in _SAMPLERS:
+            continue
+        codes: List[CodeType] = []
+        while frame is not None:
+            codes.append(frame.f_code)
+            frame = frame.f_back
+        if not codes or (not include_idle and _idle(codes[0])):
+            continue
+        codes.reverse()
+        yield names.get(ident, str(ident)), tuple(codes)
+
+
+def _idle(leaf: CodeType) -> bool:
+    return (os.path.basename(leaf.co_filename), leaf.co_name) in _IDLE_LEAVES
+
+
+def _pstats_key(code: CodeType) -> Tuple[str, int, str]:
+    return code.co_filename, code.co_firstlineno, code.co_name
+
+
+@functools.lru_cache(maxsize=4096)
+def _short_path(filename: str) -> str:
+    # Relative to the longest sys.path entry containing it, like a module path.
+    for root in sorted((path for path in sys.path if path), key=len, reverse=True):
+        prefix = os.path.join(os.path.abspath(root), "")
+        if filename.startswith(prefix):
+            return filename[len(prefix) :]
+    return filename
@@ -1,18 +1,39 @@
 from __future__ import annotations
 
+import asyncio
+import itertools
 import json
 import logging
 import os
+import shutil
+import tempfile
+import threading
 import time
-import urllib.request
-from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from dataclasses import dataclass, fields, replace
+from datetime import datetime, timezone
+from functools import cached_property
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+from uuid import uuid4
 
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
 
+from app.services import http_client, observability, tracing
+from app.services.cache import LRUCache
+from app.services.columnar import (
+    IdIndex,
+    InternedColumn,
+    InternedColumnBuilder,
+    StringColumn,
+    StringColumnBuilder,
+)
+from app.services.ranking import top_k_indices
+from app.services.rerank_cache import RerankCache
 
-@dataclass(frozen=True)
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True, slots=True)
 class InfluencerDoc:
     id: str
     name: str
@@ -21,6 +42,78 @@ class InfluencerDoc:
     region: str
 
 
+_DOC_COLUMNS = tuple(field.name for field in fields(InfluencerDoc))
+# Low-cardinality doc columns, stored as codes into a tuple of values.
+_INTERNED_COLUMNS = ("category", "region")
+
+
+class DocStore(Sequence[InfluencerDoc]):
+    """Docs held column-wise; rows decode to slotted InfluencerDoc views on access.
+
+    Columns are ``app.services.columnar`` string columns, so a store can
+    share them with the recommender catalog or map them from a snapshot.
+    """
+
+    __slots__ = ("columns",)
+
+    def __init__(self, columns: Dict[str, StringColumn | InternedColumn]) -> None:
+        self.columns = columns
+
+    @classmethod
+    def from_docs(cls, docs: Iterable[InfluencerDoc]) -> DocStore:
+        builders = {
+            column: (
+                InternedColumnBuilder() if column in _INTERNED_COLUMNS else StringColumnBuilder()
+            )
+            for column in _DOC_COLUMNS
+        }
+        for doc in docs:
+            for column, builder in builders.items():
+                builder.append(getattr(doc, column))
+        return cls({column: builder.finish() for column, builder in builders.items()})
+
+    @classmethod
+    def concat(cls, stores: Sequence[DocStore]) -> DocStore:
+        columns = {}
+        for column in _DOC_COLUMNS:
+            parts = [store.columns[column] for store in stores]
+            if all(isinstance(part, InternedColumn) for part in parts):
+                columns[column] = InternedColumn.concat(parts)
+            else:
+                columns[column] = StringColumn.concat([_string_column(part) for part in parts])
+        return cls(columns)
+
+    @property
+    def ids(self) -> StringColumn | InternedColumn:
+        return self.columns["id"]
+
+    def __len__(self) -> int:
+        return len(self.columns["id"])
+
+    def __getitem__(self, row):  # type: ignore[override]
+        if isinstance(row, slice):
+            return [self[item] for item in range(*row.indices(len(self)))]
+        return InfluencerDoc(*(self.columns[column][row] for column in _DOC_COLUMNS))
+
+    def __iter__(self) -> Iterator[InfluencerDoc]:
+        for values in zip(*(self.columns[column] for column in _DOC_COLUMNS)):
+            yield InfluencerDoc(*values)
+
+    def take(self, rows: np.ndarray) -> DocStore:
+        return DocStore({column: values.take(rows) for column, values in self.columns.items()})
+
+    def unique(self) -> DocStore:
+        """Drop repeated ids; each keeps its first position and last value."""
+        rows = IdIndex(self.ids).dedupe_rows()
+        return self if rows is None else self.take(rows)
+
+
+def _string_column(column: StringColumn | InternedColumn) -> StringColumn:
+    if isinstance(column, StringColumn):
+        return column
+    return StringColumn.from_strings(column)
+
+
 INFLUENCER_DOCS: List[InfluencerDoc] = [
     InfluencerDoc(
         id="doc-001",
@@ -85,14 +178,292 @@ def _doc_text(doc: InfluencerDoc) -> str:
     return f"{doc.bio} {doc.category} {doc.region}"
 
 
-_VECTORIZER = TfidfVectorizer(stop_words="english")
-_DOC_MATRIX = _VECTORIZER.fit_transform([_doc_text(doc) for doc in INFLUENCER_DOCS])
-_KEYWORD_VECTORIZER = TfidfVectorizer(stop_words="english", use_idf=True, norm=None)
-_KEYWORD_MATRIX = _KEYWORD_VECTORIZER.fit_transform(
-    [f"{doc.bio} {doc.category} {doc.region} {doc.name}" for doc in INFLUENCER_DOCS]
+def _keyword_text(doc: InfluencerDoc) -> str:
+    return f"{doc.bio} {doc.category} {doc.region} {doc.name}"
+
+
+@dataclass(frozen=True)
+class _FieldIndex:
+    """Hashed term counts for one text field and the IDF they are scored with.
+
+    ``df`` tracks live document frequencies on every upsert/delete, while
+    ``idf`` and ``norms`` are only re-derived from it on compaction.
+    """
+
+    counts: sparse.csr_matrix
+    df: np.ndarray
+    idf: np.ndarray
+    norms: np.ndarray
+
+
+HASH_FEATURES = int(os.environ.get("RAG_HASH_FEATURES", str(2**20)))
+COMPACTION_RATIO = float(os.environ.get("RAG_COMPACTION_RATIO", "0.2"))
+INDEX_DIR = os.environ.get("RAG_INDEX_DIR")
+INDEX_KEEP = int(os.environ.get("RAG_INDEX_KEEP", "2"))
+INDEX_FORMAT_VERSION = 1
+
+# Hashed features keep the matrix width fixed, so changed docs can be
+# vectorized on their own without refitting a vocabulary over the corpus.
+_VECTORIZER = HashingVectorizer(
+    stop_words="english",
+    n_features=HASH_FEATURES,
+    alternate_sign=False,
+    norm=None,
+    dtype=np.float32,
 )
 
-logger = logging.getLogger(__name__)
+
+# Docs hashed per batch, so a corpus' text is never materialized at once.
+_HASH_CHUNK_DOCS = 20_000
+
+
+def _hash_counts(texts: Iterable[str]) -> sparse.csr_matrix:
+    iterator = iter(texts)
+    parts = []
+    while chunk := list(itertools.islice(iterator, _HASH_CHUNK_DOCS)):
+        parts.append(_VECTORIZER.transform(chunk).tocsr())
+    if not parts:
+        return sparse.csr_matrix((0, HASH_FEATURES), dtype=np.float32)
+    return parts[0] if len(parts) == 1 else sparse.vstack(parts, format="csr")
+
+
+def _document_frequency(counts: sparse.csr_matrix) -> np.ndarray:
+    return np.bincount(counts.indices, minlength=counts.shape[1]).astype(np.int64)
+
+
+def _idf(df: np.ndarray, n_docs: int) -> np.ndarray:
+    # Smoothed IDF, identical to TfidfVectorizer(smooth_idf=True).
+    return np.log((1.0 + n_docs) / (1.0 + df)) + 1.0
+
+
+def _row_norms(counts: sparse.csr_matrix, idf: np.ndarray) -> np.ndarray:
+    weighted = counts.data * idf[counts.indices]
+    rows = np.repeat(np.arange(counts.shape[0]), np.diff(counts.indptr))
+    return np.sqrt(np.bincount(rows, weights=weighted * weighted, minlength=counts.shape[0]))
+
+
+def _build_field(texts: Iterable[str]) -> _FieldIndex:
+    counts = _hash_counts(texts)
+    df = _document_frequency(counts)
+    idf = _idf(df, counts.shape[0])
+    return _FieldIndex(counts=counts, df=df, idf=idf, norms=_row_norms(counts, idf))
+
+
+def _update_field(field: _FieldIndex, keep_rows: np.ndarray, texts: List[str]) -> _FieldIndex:
+    """Drop rows not in ``keep_rows`` and append ``texts`` using the frozen IDF."""
+    dropped = np.setdiff1d(np.arange(field.counts.shape[0]), keep_rows, assume_unique=True)
+    df = field.df.copy()
+    if dropped.size:
+        df -= _document_frequency(field.counts[dropped])
+    added = _hash_counts(texts)
+    df += _document_frequency(added)
+    counts = sparse.vstack([field.counts[keep_rows], added], format="csr")
+    norms = np.concatenate([field.norms[keep_rows], _row_norms(added, field.idf)])
+    return _FieldIndex(counts=counts, df=df, idf=field.idf, norms=norms)
+
+
+def _compact_field(field: _FieldIndex) -> _FieldIndex:
+    idf = _idf(field.df, field.counts.shape[0])
+    return _FieldIndex(
+        counts=field.counts, df=field.df, idf=idf, norms=_row_norms(field.counts, idf)
+    )
+
+
+@dataclass(frozen=True)
+class RagIndex:
+    """Immutable, self-consistent view of the searchable corpus.
+
+    Writers build a new instance off to the side and publish it with a single
+    reference swap; readers pin one instance for the whole query, so docs and
+    matrices can never come from different refreshes.
+    """
+
+    docs: DocStore
+    doc_field: _FieldIndex
+    keyword_field: _FieldIndex
+    version: int
+    built_at: str
+    pending_changes: int = 0
+
+    @cached_property
+    def id_index(self) -> IdIndex:
+        return IdIndex(self.docs.ids)
+
+
+def _build_index(docs: Sequence[InfluencerDoc], version: int) -> RagIndex:
+    docs = docs if isinstance(docs, DocStore) else DocStore.from_docs(docs)
+    return RagIndex(
+        docs=docs,
+        doc_field=_build_field(_doc_text(doc) for doc in docs),
+        keyword_field=_build_field(_keyword_text(doc) for doc in docs),
+        version=version,
+        built_at=datetime.now(timezone.utc).isoformat(),
+    )
+
+
+# --------- ON-DISK SNAPSHOTS ---------
+#
+# <RAG_INDEX_DIR>/CURRENT names the active snapshot directory, which holds a
+# manifest.json plus one .npy file per array: CSR data/indices/indptr, df, idf
+# and norms for each field, and every doc column as a UTF-8 blob + offsets.
+# Arrays are opened with mmap_mode="r", so boot does no parsing or fitting and
+# workers on the same node share the page cache.
+
+_FIELD_NAMES = ("doc", "keyword")
+
+
+def save_index(index: RagIndex | None = None, directory: str | None = None) -> str | None:
+    """Write ``index`` (default: the published one) as the current snapshot.
+
+    No-op returning None when no directory is configured.
+    """
+    directory = directory or INDEX_DIR
+    if not directory:
+        return None
+    index = index or _INDEX
+    os.makedirs(directory, exist_ok=True)
+
+    name = f"v{INDEX_FORMAT_VERSION}-{index.version:08d}-{uuid4().hex[:8]}"
+    staging = os.path.join(directory, f".{name}.tmp")
+    os.makedirs(staging)
+    for field_name, field in zip(_FIELD_NAMES, (index.doc_field, index.keyword_field)):
+        arrays = {
+            "data": field.counts.data,
+            "indices": field.counts.indices,
+            "indptr": field.counts.indptr,
+            "df": field.df,
+            "idf": field.idf,
+            "norms": field.norms,
+        }
+        for key, array in arrays.items():
+            np.save(os.path.join(staging, f"{field_name}.{key}.npy"), array)
+    for column in _DOC_COLUMNS:
+        values = _string_column(index.docs.columns[column])
+        np.save(os.path.join(staging, f"docs.{column}.blob.npy"), values.blob)
+        np.save(os.path.join(staging, f"docs.{column}.offsets.npy"), values.offsets)
+
+    manifest = {
+        "format_version": INDEX_FORMAT_VERSION,
+        "version": index.version,
+        "built_at": index.built_at,
+        "pending_changes": index.pending_changes,
+        "hash_features": HASH_FEATURES,
+        "n_docs": len(index.docs),
+    }
+    with open(os.path.join(staging, "manifest.json"), "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle)
+
+    path = os.path.join(directory, name)
+    os.rename(staging, path)
+    pointer = os.path.join(directory, f".CURRENT.{uuid4().hex[:8]}")
+    with open(pointer, "w", encoding="utf-8") as handle:
+        handle.write(name)
+    os.replace(pointer, os.path.join(directory, "CURRENT"))
+    _prune_snapshots(directory, keep=name)
+    logger.info(
+        "rag.snapshot.saved path=%s version=%s docs=%s", path, index.version, len(index.docs)
+    )
+    return path
+
+
+def load_index(directory: str | None = None, newer_than: int = -1) -> RagIndex | None:
+    """Open the current snapshot in ``directory`` memory-mapped, or return None.
+
+    Also None when the snapshot's version is not above ``newer_than``, which
+    is checked before any array is opened.
+    """
+    directory = directory or INDEX_DIR
+    if not directory:
+        return None
+    try:
+        with open(os.path.join(directory, "CURRENT"), encoding="utf-8") as handle:
+            path = os.path.join(directory, handle.read().strip())
+        with open(os.path.join(path, "manifest.json"), encoding="utf-8") as handle:
+            manifest = json.load(handle)
+    except FileNotFoundError:
+        return None
+
+    if (
+        manifest.get("format_version") != INDEX_FORMAT_VERSION
+        or manifest.get("hash_features") != HASH_FEATURES
+    ):
+        logger.warning("rag.snapshot.incompatible path=%s manifest=%s", path, manifest)
+        return None
+    if manifest["version"] <= newer_than:
+        return None
+
+    shape = (manifest["n_docs"], HASH_FEATURES)
+    loaded: Dict[str, _FieldIndex] = {}
+    for field_name in _FIELD_NAMES:
+        counts = sparse.csr_matrix(
+            (
+                _load_array(path, f"{field_name}.data"),
+                _load_array(path, f"{field_name}.indices"),
+                _load_array(path, f"{field_name}.indptr"),
+            ),
+            shape=shape,
+            copy=False,
+        )
+        loaded[field_name] = _FieldIndex(
+            counts=counts,
+            df=_load_array(path, f"{field_name}.df"),
+            idf=_load_array(path, f"{field_name}.idf"),
+            norms=_load_array(path, f"{field_name}.norms"),
+        )
+    docs = DocStore(
+        {
+            column: StringColumn(
+                _load_array(path, f"docs.{column}.blob"),
+                _load_array(path, f"docs.{column}.offsets"),
+            )
+            for column in _DOC_COLUMNS
+        }
+    )
+    return RagIndex(
+        docs=docs,
+        doc_field=loaded["doc"],
+        keyword_field=loaded["keyword"],
+        version=manifest["version"],
+        built_at=manifest["built_at"],
+        pending_changes=manifest.get("pending_changes", 0),
+    )
+
+
+def _load_array(path: str, name: str) -> np.ndarray:
+    filename = os.path.join(path, f"{name}.npy")
+    try:
+        return np.load(filename, mmap_mode="r")
+    except ValueError:
+        # Zero-length arrays cannot be memory-mapped.
+        return np.load(filename)
+
+
+def _prune_snapshots(directory: str, keep: str) -> None:
+    snapshots = sorted(
+        entry
+        for entry in os.listdir(directory)
+        if entry.startswith(f"v{INDEX_FORMAT_VERSION}-") and entry != keep
+    )
+    for entry in snapshots[: max(len(snapshots) - (INDEX_KEEP - 1), 0)]:
+        # Workers that still map the old files keep them alive until they reload.
+        shutil.rmtree(os.path.join(directory, entry), ignore_errors=True)
+
+
+def _initial_index() -> RagIndex:
+    try:
+        loaded = load_index()
+    except Exception:
+        logger.exception("rag.snapshot.load_failed dir=%s", INDEX_DIR)
+        loaded = None
+    if loaded is not None:
+        logger.info("rag.snapshot.loaded version=%s docs=%s", loaded.version, len(loaded.docs))
+        return loaded
+    return _build_index(INFLUENCER_DOCS, version=1)
+
+
+_WRITE_LOCK = threading.Lock()
+_COMPACTION_THREAD: threading.Thread | None = None
+_INDEX = _initial_index()
 
 DEFAULT_MODE = os.environ.get("RAG_DEFAULT_MODE", "hybrid")
 VECTOR_WEIGHT = float(os.environ.get("RAG_VECTOR_WEIGHT", "0.6"))
@@ -101,6 +472,43 @@ RERANK_MODE = os.environ.get("RAG_RERANK_MODE", "none")
 RERANK_MODEL = os.environ.get("RAG_RERANK_MODEL", "gpt-4o-mini")
 RERANK_TIMEOUT_S = float(os.environ.get("RAG_RERANK_TIMEOUT_S", "8"))
 
+QUERY_CACHE_SIZE = int(os.environ.get("RAG_QUERY_CACHE_SIZE", "1024"))
+QUERY_CACHE_TTL_S = float(os.environ.get("RAG_QUERY_CACHE_TTL_S", "300"))
+
+# Keys carry the index version, and _publish clears the cache, so results
+# never outlive the corpus they were computed from.
+_QUERY_CACHE: LRUCache[List[Tuple[InfluencerDoc, float]]] = LRUCache(
+    QUERY_CACHE_SIZE, ttl_s=QUERY_CACHE_TTL_S
+)
+observability.register_cache("rag_query", _QUERY_CACHE)
+
+# Next to the index snapshots when RAG_INDEX_DIR is set, so the cache
+# outlives the pod; otherwise in the temp dir.
+RERANK_CACHE_PATH = os.environ.get(
+    "RAG_RERANK_CACHE_PATH",
+    os.path.join(
+        INDEX_DIR or os.path.join(tempfile.gettempdir(), "nivoxai"), "rerank_cache.sqlite3"
+    ),
+)
+RERANK_CACHE_MAX_ENTRIES = int(os.environ.get("RAG_RERANK_CACHE_MAX_ENTRIES", "10000"))
+
+_RERANK_CACHE = RerankCache(RERANK_CACHE_PATH, RERANK_CACHE_MAX_ENTRIES)
+observability.register_cache("rag_rerank", _RERANK_CACHE)
+observability.register_gauge(
+    "rag_index_docs", "Documents in the published RAG index.", lambda: len(_INDEX.docs)
+)
+observability.register_gauge(
+    "rag_index_version", "Version of the published RAG index.", lambda: _INDEX.version
+)
+observability.register_gauge(
+    "rag_index_pending_changes",
+    "Docs changed since the RAG index's IDF was last fitted.",
+    lambda: _INDEX.pending_changes,
+)
+
+# Upper bound on dense score cells (queries x docs) materialized per batch chunk.
+_BATCH_SCORE_CELLS = 4_000_000
+
 
 def search_influencers(
     query: str,
@@ -113,82 +521,469 @@ def search_influencers(
         return []
 
     start = time.perf_counter()
+    index = _INDEX
     selected_mode = mode or DEFAULT_MODE
     candidate_k = candidate_k or max(top_k * 3, top_k)
 
-    vector_scores = _score_vector(query)
-    keyword_scores = _score_keyword(query)
+    cache_key = _query_cache_key(query, selected_mode, top_k, candidate_k, rerank, index)
+    cached = _QUERY_CACHE.get(cache_key)
+    if cached is not None:
+        final_results = list(cached)
+    else:
+        candidates = _retrieve(index, query, selected_mode, candidate_k)
+        final_results = _maybe_rerank(query, candidates, rerank)[:top_k]
+        _QUERY_CACHE.put(cache_key, list(final_results))
+
+    _log_search(
+        selected_mode, rerank, top_k, candidate_k, index, cached is not None, start, final_results
+    )
+    return final_results
+
+
+async def search_influencers_async(
+    query: str,
+    top_k: int = 5,
+    mode: str | None = None,
+    rerank: bool = False,
+    candidate_k: int | None = None,
+) -> List[Tuple[InfluencerDoc, float]]:
+    """Same as search_influencers without blocking the event loop.
+
+    Scoring runs in a worker thread and the LLM rerank awaits the pooled
+    async HTTP client.
+    """
+    if not query.strip():
+        return []
+
+    start = time.perf_counter()
+    index = _INDEX
+    selected_mode = mode or DEFAULT_MODE
+    candidate_k = candidate_k or max(top_k * 3, top_k)
 
-    if selected_mode == "vector":
-        combined_scores = vector_scores
-    elif selected_mode == "keyword":
-        combined_scores = keyword_scores
+    cache_key = _query_cache_key(query, selected_mode, top_k, candidate_k, rerank, index)
+    cached = _QUERY_CACHE.get(cache_key)
+    if cached is not None:
+        final_results = list(cached)
     else:
-        combined_scores = _combine_scores(vector_scores, keyword_scores)
+        candidates = await asyncio.to_thread(_retrieve, index, query, selected_mode, candidate_k)
+        final_results = (await _maybe_rerank_async(query, candidates, rerank))[:top_k]
+        _QUERY_CACHE.put(cache_key, list(final_results))
 
-    ranked_indices = sorted(
-        range(len(combined_scores)),
-        key=lambda idx: combined_scores[idx],
-        reverse=True,
-    )[:candidate_k]
-    candidates = [(INFLUENCER_DOCS[index], combined_scores[index]) for index in ranked_indices]
+    _log_search(
+        selected_mode, rerank, top_k, candidate_k, index, cached is not None, start, final_results
+    )
+    return final_results
+
+
+def search_influencers_batch(
+    queries: List[str],
+    top_k: int = 5,
+    mode: str | None = None,
+    rerank: bool = False,
+    candidate_k: int | None = None,
+) -> List[List[Tuple[InfluencerDoc, float]]]:
+    """Run many queries against one index snapshot, returning results in input order.
+
+    All queries are hashed in one call and scored with one sparse product per
+    chunk of rows; blank queries yield an empty result.
+    """
+    start = time.perf_counter()
+    index = _INDEX
+    selected_mode = mode or DEFAULT_MODE
+    candidate_k = candidate_k or max(top_k * 3, top_k)
+
+    results, pending = _cached_batch(index, queries, selected_mode, top_k, candidate_k, rerank)
+    retrieved = _retrieve_batch(index, queries, pending, selected_mode, candidate_k)
+    for position, candidates in retrieved:
+        results[position] = _maybe_rerank(queries[position], candidates, rerank)[:top_k]
+        _QUERY_CACHE.put(
+            _query_cache_key(queries[position], selected_mode, top_k, candidate_k, rerank, index),
+            list(results[position]),
+        )
+
+    _log_batch(selected_mode, rerank, top_k, candidate_k, index, len(queries), len(pending), start)
+    return results
 
-    final_results = _maybe_rerank(query, candidates, rerank)
-    final_results = final_results[:top_k]
 
+async def search_influencers_batch_async(
+    queries: List[str],
+    top_k: int = 5,
+    mode: str | None = None,
+    rerank: bool = False,
+    candidate_k: int | None = None,
+) -> List[List[Tuple[InfluencerDoc, float]]]:
+    """Async search_influencers_batch; per-query reranks run concurrently."""
+    start = time.perf_counter()
+    index = _INDEX
+    selected_mode = mode or DEFAULT_MODE
+    candidate_k = candidate_k or max(top_k * 3, top_k)
+
+    results, pending = _cached_batch(index, queries, selected_mode, top_k, candidate_k, rerank)
+    retrieved = await asyncio.to_thread(
+        lambda: list(_retrieve_batch(index, queries, pending, selected_mode, candidate_k))
+    )
+    reranked = await asyncio.gather(
+        *(
+            _maybe_rerank_async(queries[position], candidates, rerank)
+            for position, candidates in retrieved
+        )
+    )
+    for (position, _), final_results in zip(retrieved, reranked):
+        results[position] = final_results[:top_k]
+        _QUERY_CACHE.put(
+            _query_cache_key(queries[position], selected_mode, top_k, candidate_k, rerank, index),
+            list(results[position]),
+        )
+
+    _log_batch(selected_mode, rerank, top_k, candidate_k, index, len(queries), len(pending), start)
+    return results
+
+
+def _retrieve(
+    index: RagIndex, query: str, mode: str, candidate_k: int
+) -> List[Tuple[InfluencerDoc, float]]:
+    scores = _score_queries(index, [query], mode)[0]
+    with tracing.span("rag", "top_k"):
+        return [
+            (index.docs[row], float(scores[row])) for row in top_k_indices(scores, candidate_k)
+        ]
+
+
+def _retrieve_batch(
+    index: RagIndex,
+    queries: List[str],
+    positions: List[int],
+    mode: str,
+    candidate_k: int,
+) -> Iterator[Tuple[int, List[Tuple[InfluencerDoc, float]]]]:
+    """Yield (position, candidates) for ``positions``, scoring a chunk of rows at a time."""
+    chunk_size = max(1, _BATCH_SCORE_CELLS // max(len(index.docs), 1))
+    for offset in range(0, len(positions), chunk_size):
+        chunk = positions[offset : offset + chunk_size]
+        scores = _score_queries(index, [queries[position] for position in chunk], mode)
+        ranked = []
+        with tracing.span("rag", "top_k"):
+            for row, position in enumerate(chunk):
+                ranked_indices = top_k_indices(scores[row], candidate_k)
+                ranked.append(
+                    (
+                        position,
+                        [(index.docs[doc], float(scores[row, doc])) for doc in ranked_indices],
+                    )
+                )
+        yield from ranked
+
+
+def _cached_batch(
+    index: RagIndex,
+    queries: List[str],
+    mode: str,
+    top_k: int,
+    candidate_k: int,
+    rerank: bool,
+) -> Tuple[List[List[Tuple[InfluencerDoc, float]]], List[int]]:
+    """Fill results from the query cache; return them with the positions still to score."""
+    results: List[List[Tuple[InfluencerDoc, float]]] = [[] for _ in queries]
+    pending: List[int] = []
+    for position, query in enumerate(queries):
+        if not query.strip():
+            continue
+        cached = _QUERY_CACHE.get(_query_cache_key(query, mode, top_k, candidate_k, rerank, index))
+        if cached is not None:
+            results[position] = list(cached)
+        else:
+            pending.append(position)
+    return results, pending
+
+
+def _query_cache_key(
+    query: str,
+    mode: str,
+    top_k: int,
+    candidate_k: int,
+    rerank: bool,
+    index: RagIndex,
+) -> Tuple[object, ...]:
+    # The analyzer lowercases and tokenizes, so case and spacing never change scores.
+    normalized = " ".join(query.lower().split())
+    return (normalized, mode, top_k, candidate_k, rerank, index.version)
+
+
+def _log_search(
+    mode: str,
+    rerank: bool,
+    top_k: int,
+    candidate_k: int,
+    index: RagIndex,
+    cache_hit: bool,
+    start: float,
+    final_results: List[Tuple[InfluencerDoc, float]],
+) -> None:
     latency_ms = int(round((time.perf_counter() - start) * 1000))
     scores = [score for _, score in final_results]
     avg_score = sum(scores) / len(scores) if scores else 0.0
     top_score = scores[0] if scores else 0.0
     logger.info(
-        "rag.search mode=%s rerank=%s k=%s candidate_k=%s latency_ms=%s avg_score=%.4f top_score=%.4f",
-        selected_mode,
+        "rag.search mode=%s rerank=%s k=%s candidate_k=%s index_version=%s cache_hit=%s "
+        "latency_ms=%s avg_score=%.4f top_score=%.4f",
+        mode,
         rerank,
         top_k,
         candidate_k,
+        index.version,
+        cache_hit,
         latency_ms,
         avg_score,
         top_score,
     )
 
-    return final_results
 
+def _log_batch(
+    mode: str,
+    rerank: bool,
+    top_k: int,
+    candidate_k: int,
+    index: RagIndex,
+    queries: int,
+    scored: int,
+    start: float,
+) -> None:
+    logger.info(
+        "rag.search_batch mode=%s rerank=%s k=%s candidate_k=%s index_version=%s queries=%s "
+        "scored=%s latency_ms=%s",
+        mode,
+        rerank,
+        top_k,
+        candidate_k,
+        index.version,
+        queries,
+        scored,
+        int(round((time.perf_counter() - start) * 1000)),
+    )
+
+
+def get_index() -> RagIndex:
+    """Return the currently published index snapshot."""
+    return _INDEX
+
+
+def reload_index() -> bool:
+    """Publish the on-disk snapshot if it is newer than the in-memory index."""
+    with _WRITE_LOCK:
+        loaded = load_index(newer_than=_INDEX.version)
+        if loaded is None:
+            return False
+        _publish(loaded)
+        return True
+
+
+def refresh_documents(docs: Sequence[InfluencerDoc]) -> None:
+    """Replace the corpus with ``docs``, re-vectorizing only what changed.
+
+    Unchanged docs keep their rows; new or edited docs are appended and docs
+    missing from ``docs`` are deleted. Falls back to a full rebuild when more
+    than ``RAG_COMPACTION_RATIO`` of the corpus changed. A ``DocStore`` is
+    indexed as-is, sharing its columns.
+    """
+    incoming = (docs if isinstance(docs, DocStore) else DocStore.from_docs(docs)).unique()
+    with _WRITE_LOCK:
+        current = _INDEX
+        current_rows = current.id_index.find(incoming.ids)
+        changed = np.array(
+            [
+                row
+                for row, (doc, current_row) in enumerate(zip(incoming, current_rows.tolist()))
+                if current_row < 0 or current.docs[current_row] != doc
+            ],
+            dtype=np.intp,
+        )
+        kept = np.zeros(len(current.docs), dtype=bool)
+        kept[current_rows[current_rows >= 0]] = True
+        deleted = np.flatnonzero(~kept)
+        if changed.size + deleted.size > COMPACTION_RATIO * max(len(incoming), 1):
+            _publish(_build_index(incoming, current.version + 1))
+        else:
+            _apply_changes(current, incoming.take(changed), deleted)
 
-def refresh_documents(docs: List[InfluencerDoc]) -> None:
-    global INFLUENCER_DOCS, _DOC_MATRIX, _KEYWORD_MATRIX
-    INFLUENCER_DOCS = docs
-    _DOC_MATRIX = _VECTORIZER.fit_transform([_doc_text(doc) for doc in INFLUENCER_DOCS])
-    _KEYWORD_MATRIX = _KEYWORD_VECTORIZER.fit_transform(
-        [f"{doc.bio} {doc.category} {doc.region} {doc.name}" for doc in INFLUENCER_DOCS]
+
+def upsert_documents(docs: Iterable[InfluencerDoc]) -> None:
+    """Insert or replace docs by id; only these docs are vectorized."""
+    upserts = DocStore.from_docs(docs).unique()
+    if not len(upserts):
+        return
+    with _WRITE_LOCK:
+        _apply_changes(_INDEX, upserts, np.empty(0, dtype=np.intp))
+
+
+def apply_document_changes(upserts: Sequence[InfluencerDoc], deleted_ids: Iterable[str]) -> None:
+    """Upsert ``upserts`` and delete ``deleted_ids`` as one published version.
+
+    For callers that already know the delta; only ``upserts`` are
+    vectorized and the rest of the corpus is not compared.
+    """
+    upserts = (upserts if isinstance(upserts, DocStore) else DocStore.from_docs(upserts)).unique()
+    with _WRITE_LOCK:
+        current = _INDEX
+        _apply_changes(current, upserts, current.id_index.rows(deleted_ids))
+
+
+def delete_documents(doc_ids: Iterable[str]) -> None:
+    with _WRITE_LOCK:
+        current = _INDEX
+        deleted = current.id_index.rows(doc_ids)
+        if deleted.size:
+            _apply_changes(current, DocStore.from_docs(()), deleted)
+
+
+def compact_index() -> None:
+    """Re-derive IDF weights and row norms from the live document frequencies."""
+    with _WRITE_LOCK:
+        current = _INDEX
+        if not current.pending_changes:
+            return
+        started = time.perf_counter()
+        _publish(
+            replace(
+                current,
+                doc_field=_compact_field(current.doc_field),
+                keyword_field=_compact_field(current.keyword_field),
+                version=current.version + 1,
+                built_at=datetime.now(timezone.utc).isoformat(),
+                pending_changes=0,
+            )
+        )
+        logger.info(
+            "rag.compact docs=%s pending_changes=%s latency_ms=%s",
+            len(current.docs),
+            current.pending_changes,
+            int(round((time.perf_counter() - started) * 1000)),
+        )
+
+
+def wait_for_compaction() -> None:
+    """Block until a compaction scheduled by an earlier change has published."""
+    thread = _COMPACTION_THREAD
+    if thread is not None:
+        thread.join()
+
+
+def _publish(index: RagIndex) -> None:
+    """Swap in ``index`` for new queries. Caller holds _WRITE_LOCK."""
+    global _INDEX
+    _INDEX = index
+    _QUERY_CACHE.clear()
+
+
+def _apply_changes(current: RagIndex, upserts: DocStore, deleted_rows: np.ndarray) -> None:
+    """Publish ``current`` with ``upserts`` appended and replaced/deleted rows dropped.
+
+    Caller holds _WRITE_LOCK.
+    """
+    if not len(upserts) and not deleted_rows.size:
+        return
+    replaced_rows = current.id_index.find(upserts.ids)
+    keep = np.ones(len(current.docs), dtype=bool)
+    keep[replaced_rows[replaced_rows >= 0]] = False
+    keep[deleted_rows] = False
+    keep_rows = np.flatnonzero(keep)
+    docs = DocStore.concat([current.docs.take(keep_rows), upserts])
+    pending_changes = current.pending_changes + len(upserts) + deleted_rows.size
+
+    _publish(
+        RagIndex(
+            docs=docs,
+            doc_field=_update_field(
+                current.doc_field, keep_rows, [_doc_text(doc) for doc in upserts]
+            ),
+            keyword_field=_update_field(
+                current.keyword_field, keep_rows, [_keyword_text(doc) for doc in upserts]
+            ),
+            version=current.version + 1,
+            built_at=datetime.now(timezone.utc).isoformat(),
+            pending_changes=pending_changes,
+        )
+    )
+    if pending_changes > COMPACTION_RATIO * max(len(docs), 1):
+        _schedule_compaction()
+
+
+def _schedule_compaction() -> None:
+    global _COMPACTION_THREAD
+    if _COMPACTION_THREAD is not None and _COMPACTION_THREAD.is_alive():
+        return
+    _COMPACTION_THREAD = threading.Thread(
+        target=compact_index, name="rag-compaction", daemon=True
     )
+    _COMPACTION_THREAD.start()
+
+
+def _score_queries(index: RagIndex, queries: List[str], mode: str) -> np.ndarray:
+    """Return a (len(queries), n_docs) array of normalized scores for ``mode``."""
+    with tracing.span("rag", "vectorize"):
+        query_counts = _hash_counts(queries)
+    with tracing.span("rag", "score"):
+        if mode == "vector":
+            return _score_vector(index.doc_field, query_counts)
+        if mode == "keyword":
+            return _score_keyword(index.keyword_field, query_counts)
+        return _combine_scores(
+            _score_vector(index.doc_field, query_counts),
+            _score_keyword(index.keyword_field, query_counts),
+        )
+
 
+def _score_vector(field: _FieldIndex, query_counts: sparse.csr_matrix) -> np.ndarray:
+    with tracing.span("rag", "matmul"):
+        query_weights, query_norms = _query_weights(field, query_counts)
+        dots = (query_weights @ field.counts.T).toarray()
+    with tracing.span("rag", "normalize"):
+        norms = np.outer(query_norms, field.norms)
+        scores = np.divide(dots, norms, out=np.zeros_like(dots), where=norms > 0)
+        return _normalize_scores(scores)
 
-def _score_vector(query: str) -> List[float]:
-    query_vector = _VECTORIZER.transform([query])
-    scores = cosine_similarity(query_vector, _DOC_MATRIX).flatten()
-    return _normalize_scores(scores.tolist())
 
+def _score_keyword(field: _FieldIndex, query_counts: sparse.csr_matrix) -> np.ndarray:
+    with tracing.span("rag", "matmul"):
+        query_weights, _ = _query_weights(field, query_counts)
+        dots = (query_weights @ field.counts.T).toarray()
+    with tracing.span("rag", "normalize"):
+        return _normalize_scores(dots)
 
-def _score_keyword(query: str) -> List[float]:
-    query_vector = _KEYWORD_VECTORIZER.transform([query])
-    scores = (query_vector @ _KEYWORD_MATRIX.T).toarray().flatten().tolist()
-    return _normalize_scores(scores)
 
+def _query_weights(
+    field: _FieldIndex, query_counts: sparse.csr_matrix
+) -> Tuple[sparse.csr_matrix, np.ndarray]:
+    """Fold both IDF factors of a TF-IDF dot product into the query vectors.
 
-def _normalize_scores(scores: List[float]) -> List[float]:
-    if not scores:
+    Returns the re-weighted queries and the L2 norm of each query's TF-IDF
+    vector, with terms absent from the corpus ignored as a fitted vocabulary
+    would.
+    """
+    terms = query_counts.indices
+    tfidf = query_counts.data * field.idf[terms] * (field.df[terms] > 0)
+    weighted = sparse.csr_matrix(
+        (tfidf * field.idf[terms], terms, query_counts.indptr), shape=query_counts.shape
+    )
+    rows = np.repeat(np.arange(query_counts.shape[0]), np.diff(query_counts.indptr))
+    norms = np.sqrt(np.bincount(rows, weights=tfidf * tfidf, minlength=query_counts.shape[0]))
+    return weighted, norms
+
+
+def _normalize_scores(scores: np.ndarray) -> np.ndarray:
+    """Min-max scale scores to [0, 1] along the last axis (per query row)."""
+    scores = np.asarray(scores, dtype=np.float64)
+    if scores.size == 0:
         return scores
-    min_score = min(scores)
-    max_score = max(scores)
-    if max_score == min_score:
-        return [0.0 for _ in scores]
-    return [(score - min_score) / (max_score - min_score) for score in scores]
+    min_score = scores.min(axis=-1, keepdims=True)
+    spread = scores.max(axis=-1, keepdims=True) - min_score
+    scores -= min_score
+    np.divide(scores, spread, out=scores, where=spread > 0)
+    return scores
 
 
-def _combine_scores(vector_scores: List[float], keyword_scores: List[float]) -> List[float]:
-    combined: List[float] = []
-    for vec_score, key_score in zip(vector_scores, keyword_scores):
-        combined.append(VECTOR_WEIGHT * vec_score + KEYWORD_WEIGHT * key_score)
+def _combine_scores(vector_scores: np.ndarray, keyword_scores: np.ndarray) -> np.ndarray:
+    combined = vector_scores * VECTOR_WEIGHT
+    combined += keyword_scores * KEYWORD_WEIGHT
     return combined
 
 
@@ -197,28 +992,68 @@ def _maybe_rerank(
     candidates: List[Tuple[InfluencerDoc, float]],
     rerank: bool,
 ) -> List[Tuple[InfluencerDoc, float]]:
-    if not rerank:
+    if not _rerank_enabled(candidates, rerank):
         return candidates
-    if RERANK_MODE != "llm":
+    # Timed here: the background loop does not run in this request's context.
+    with tracing.span("rag", "rerank"):
+        return http_client.run_sync(_rerank(query, candidates))
+
+
+async def _maybe_rerank_async(
+    query: str,
+    candidates: List[Tuple[InfluencerDoc, float]],
+    rerank: bool,
+) -> List[Tuple[InfluencerDoc, float]]:
+    if not _rerank_enabled(candidates, rerank):
         return candidates
+    with tracing.span("rag", "rerank"):
+        return await _rerank(query, candidates)
+
+
+async def _rerank(
+    query: str, candidates: List[Tuple[InfluencerDoc, float]]
+) -> List[Tuple[InfluencerDoc, float]]:
+    candidate_ids = [doc.id for doc, _ in candidates]
+    # The cache is SQLite and may wait on another worker's write lock, so
+    # keep it off the event loop.
+    score_map = await asyncio.to_thread(_RERANK_CACHE.get, query, candidate_ids, RERANK_MODEL)
+    if score_map is not None:
+        return _apply_rerank_scores(candidates, score_map)
+
     api_key = os.environ.get("OPENAI_API_KEY")
     if not api_key:
         return candidates
 
     try:
-        reranked = _llm_rerank(query, candidates, api_key)
-        if reranked:
-            return reranked
+        score_map = await _llm_rerank(query, candidates, api_key)
     except Exception:
         logger.exception("rag.rerank.failed")
-    return candidates
+        return candidates
+    await asyncio.to_thread(_RERANK_CACHE.put, query, candidate_ids, RERANK_MODEL, score_map)
+    return _apply_rerank_scores(candidates, score_map)
+
 
+def _rerank_enabled(candidates: List[Tuple[InfluencerDoc, float]], rerank: bool) -> bool:
+    return bool(rerank and candidates and RERANK_MODE == "llm")
 
-def _llm_rerank(
+
+def _apply_rerank_scores(
+    candidates: List[Tuple[InfluencerDoc, float]],
+    score_map: Dict[str, float],
+) -> List[Tuple[InfluencerDoc, float]]:
+    reranked = sorted(
+        candidates,
+        key=lambda item: score_map.get(item[0].id, item[1]),
+        reverse=True,
+    )
+    return [(doc, float(score_map.get(doc.id, score))) for doc, score in reranked]
+
+
+async def _llm_rerank(
     query: str,
     candidates: List[Tuple[InfluencerDoc, float]],
     api_key: str,
-) -> List[Tuple[InfluencerDoc, float]]:
+) -> Dict[str, float]:
     prompt_items = [
         {
             "id": doc.id,
@@ -247,28 +1082,9 @@ def _llm_rerank(
         "temperature": 0,
     }
 
-    request = urllib.request.Request(
-        "https://api.openai.com/v1/chat/completions",
-        data=json.dumps(payload).encode("utf-8"),
-        headers={
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
-        },
-        method="POST",
-    )
-
-    with urllib.request.urlopen(request, timeout=RERANK_TIMEOUT_S) as response:
-        body = json.loads(response.read().decode("utf-8"))
-        content = body["choices"][0]["message"]["content"]
+    body = await http_client.chat_completion(payload, api_key, deadline_s=RERANK_TIMEOUT_S)
+    content = body["choices"][0]["message"]["content"]
 
     parsed = json.loads(content)
     ranking = parsed.get("ranking", [])
-    score_map: Dict[str, float] = {
-        item["id"]: float(item.get("score", 0)) for item in ranking if "id" in item
-    }
-    reranked = sorted(
-        candidates,
-        key=lambda item: score_map.get(item[0].id, item[1]),
-        reverse=True,
-    )
-    return [(doc, float(score_map.get(doc.id, score))) for doc, score in reranked]
+    return {item["id"]: float(item.get("score", 0)) for item in ranking if "id" in item}
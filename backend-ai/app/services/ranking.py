@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import numpy as np
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Return indices of the k highest scores, best first.
+
+    Selection is O(n) via argpartition and only the k survivors are sorted.
+    Ties keep input order, matching a stable full sort.
+    """
+    size = scores.shape[0]
+    if k <= 0 or size == 0:
+        return np.empty(0, dtype=np.intp)
+    if k >= size:
+        return np.argsort(-scores, kind="stable")
+
+    partitioned = np.argpartition(-scores, k - 1)[:k]
+    threshold = scores[partitioned].min()
+    above = np.flatnonzero(scores > threshold)
+    ties = np.flatnonzero(scores == threshold)[: k - above.size]
+    survivors = np.concatenate((above, ties))
+    order = np.lexsort((survivors, -scores[survivors]))
+    return survivors[order]
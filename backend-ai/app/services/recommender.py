@@ -1,88 +1,426 @@
-import math
+import base64
+import hashlib
+import heapq
+import itertools
+import json
+import os
+from dataclasses import dataclass, fields
 from datetime import datetime, timezone
-from typing import List, Tuple
+from typing import Iterator, List, Sequence, Tuple
+
+import numpy as np
 
 from app.models.schemas import (
     RecommendationRequest,
     RecommendationResponse,
     RecommendationResponseItem,
 )
+from app.services import observability, scoring_pool, tracing
+from app.services.cache import LRUCache
+from app.services.catalog import (
+    InfluencerCatalog,
+    InfluencerColumns,
+    InvertedIndex,
+    build_columns,
+    build_inverted_index,
+    epoch_us,
+    get_catalog,
+)
+from app.services.columnar import IdIndex
+from app.services.ranking import top_k_indices
+from app.services.scoring import (
+    AGE_WEIGHT,
+    CONTENT_WEIGHT,
+    ENGAGEMENT_WEIGHT,
+    REGION_WEIGHT,
+    SHARED_COLUMNS,
+    CampaignTerms,
+    FactorScores,
+    ShardTask,
+    factor_scores,
+    score_shard,
+)
+
+
+@dataclass(frozen=True)
+class _Ranking:
+    columns: InfluencerColumns
+    factors: FactorScores
+    # Rows of ``columns`` best first. Memoized rankings keep only their
+    # top rows, already in order; ``total`` counts every candidate.
+    order: np.ndarray
+    total: int
+    catalog_version: int | None
+
+
+@dataclass(frozen=True)
+class RecommendationPage:
+    """One page of ranked items plus the cursor for the next page, if any.
+
+    ``items`` is lazy: response models and reason strings are built one
+    survivor at a time, so streaming callers can flush chunks as they are
+    built. Ranking itself has finished by the time the page exists.
+    """
+
+    items: Iterator[RecommendationResponseItem]
+    next_cursor: str | None
+
 
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
 
-def _normalize_engagement(influencers: List[float]) -> Tuple[float, float]:
-    if not influencers:
-        return 0.0, 0.0
-    min_rate = min(influencers)
-    max_rate = max(influencers)
-    return min_rate, max_rate
+
+RANKING_CACHE_SIZE = int(os.environ.get("RECOMMEND_RANKING_CACHE_SIZE", "32"))
+RANKING_CACHE_TTL_S = float(os.environ.get("RECOMMEND_RANKING_CACHE_TTL_S", "300"))
+# Rows kept per memoized ranking, so an entry stays small however large the
+# catalog is; pages past it re-rank deep enough to cover them.
+RANKING_DEPTH = int(os.environ.get("RECOMMEND_RANKING_DEPTH", "2000"))
+_RANKING_CACHE: LRUCache[_Ranking] = LRUCache(RANKING_CACHE_SIZE, RANKING_CACHE_TTL_S)
+observability.register_cache("recommend_ranking", _RANKING_CACHE)
+
+RESULT_CACHE_SIZE = int(os.environ.get("RECOMMEND_RESULT_CACHE_SIZE", "1024"))
+RESULT_CACHE_TTL_S = float(os.environ.get("RECOMMEND_RESULT_CACHE_TTL_S", "300"))
+# Inline candidate lists longer than this are not worth hashing for a key.
+RESULT_CACHE_INLINE_MAX = int(os.environ.get("RECOMMEND_RESULT_CACHE_INLINE_MAX", "256"))
+_RESULT_CACHE: LRUCache[RecommendationResponse] = LRUCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL_S)
+observability.register_cache("recommend_result", _RESULT_CACHE)
 
 
 def compute_recommendations(
     request: RecommendationRequest,
-    top_n: int = 10,
+    top_n: int | None = None,
 ) -> RecommendationResponse:
-    campaign = request.campaign
-    now = datetime.now(timezone.utc)
-    engagement_values = [influencer.engagement_rate for influencer in request.influencers]
-    min_rate, max_rate = _normalize_engagement(engagement_values)
-
-    items: List[RecommendationResponseItem] = []
-    for influencer in request.influencers:
-        content_haystack = f"{campaign.description} {campaign.goal}".lower()
-        category_match = influencer.category.lower() in content_haystack
-        content_score = 1.0 if category_match else 0.2
-
-        region_score = 1.0 if influencer.region == campaign.target_region else 0.0
-
-        if max_rate == min_rate:
-            engagement_score = 1.0
-        else:
-            engagement_score = (influencer.engagement_rate - min_rate) / (max_rate - min_rate)
-
-        age_match_score = 1.0 if influencer.audience_age_range == campaign.target_age_range else 0.3
-
-        base_score = (
-            0.4 * content_score
-            + 0.25 * region_score
-            + 0.25 * engagement_score
-            + 0.10 * age_match_score
+    """Return one page of recommendations, served from the result cache when possible.
+
+    Cached responses are shared; callers must not mutate them.
+    """
+    key = _result_cache_key(request, top_n)
+    if key is not None:
+        cached = _RESULT_CACHE.get(key)
+        if cached is not None:
+            return cached
+
+    page = recommendation_page(request, top_n)
+    with tracing.span("recommender", "materialize"):
+        items = list(page.items)
+    response = RecommendationResponse(
+        campaign_id=request.campaign.id,
+        recommendations=items,
+        next_cursor=page.next_cursor,
+    )
+    if key is not None:
+        _RESULT_CACHE.put(key, response)
+    return response
+
+
+def invalidate_cache() -> None:
+    """Drop cached results, e.g. after ingestion publishes a catalog.
+
+    Rankings are keyed by catalog version, so they are left to age out:
+    cursors issued on the previous snapshot keep paging its ranking.
+    """
+    _RESULT_CACHE.clear()
+
+
+def recommendation_page(
+    request: RecommendationRequest,
+    top_n: int | None = None,
+) -> RecommendationPage:
+    """Rank the request's candidates and return the requested page.
+
+    ``top_n`` overrides ``request.top_n``. The page starts at
+    ``request.cursor`` if given, else ``request.offset``. Catalog requests
+    memoize the full ranking per (request fingerprint, catalog version),
+    so later pages are slices of a cached order.
+    """
+    page_size = request.top_n if top_n is None else top_n
+    offset, cursor_version = (
+        _decode_cursor(request.cursor) if request.cursor else (request.offset, None)
+    )
+    ranking = _ranking(request, offset + page_size, cursor_version)
+    rows = ranking.order[offset : offset + page_size]
+    end = offset + rows.size
+    next_cursor = (
+        _encode_cursor(end, ranking.catalog_version)
+        if rows.size and end < ranking.total
+        else None
+    )
+    return RecommendationPage(
+        items=_page_items(ranking, rows, request.campaign.target_region),
+        next_cursor=next_cursor,
+    )
+
+
+def _ranking(
+    request: RecommendationRequest, limit: int, cursor_version: int | None
+) -> _Ranking:
+    # Rank on the rounded score so ties resolve by input order, as a stable
+    # sort of the rounded values would.
+    if request.influencers is not None:
+        # Inline lists have no stable version to key on; rank just far
+        # enough for this page.
+        columns = build_columns(request.influencers)
+        rows = _candidate_rows(request, columns, None, None)
+        if rows is not None:
+            columns = columns.take(rows)
+        factors = _score_columns(_campaign_terms(request, columns, columns.engagement), columns)
+        with tracing.span("recommender", "top_k"):
+            order = top_k_indices(np.round(factors.scores, 4), limit)
+        return _Ranking(columns, factors, order, len(columns), None)
+
+    fingerprint = _request_fingerprint(request)
+    if cursor_version is not None:
+        # Keep paging the snapshot the first page came from while cached.
+        cached = _RANKING_CACHE.get((fingerprint, cursor_version))
+        if cached is not None and _covers(cached, limit):
+            return cached
+
+    catalog = get_catalog()
+    key = (fingerprint, catalog.version)
+    cached = _RANKING_CACHE.get(key)
+    if cached is not None and _covers(cached, limit):
+        return cached
+
+    rows = _candidate_rows(request, catalog.columns, catalog.index, catalog.id_index)
+    total = len(catalog.columns) if rows is None else rows.size
+    depth = max(limit, RANKING_DEPTH)
+    if scoring_pool.enabled() and total >= scoring_pool.SHARD_THRESHOLD:
+        ranking = _sharded_ranking(request, catalog, rows, depth)
+    else:
+        columns = catalog.columns if rows is None else catalog.columns.take(rows)
+        factors = _score_columns(_campaign_terms(request, columns, columns.engagement), columns)
+        with tracing.span("recommender", "top_k"):
+            order = top_k_indices(np.round(factors.scores, 4), depth)
+        ranking = _Ranking(
+            columns.take(order),
+            FactorScores(*(getattr(factors, field.name)[order] for field in fields(factors))),
+            np.arange(order.size, dtype=np.intp),
+            total,
+            catalog.version,
         )
-        freshness_multiplier = 1.0
-        if influencer.stats_updated_at:
-            updated_at = influencer.stats_updated_at
-            if updated_at.tzinfo is None:
-                updated_at = updated_at.replace(tzinfo=timezone.utc)
-            freshness_days = max((now - updated_at).days, 0)
-            freshness_multiplier = max(0.6, math.exp(-freshness_days / 30))
-        score = base_score * freshness_multiplier
-
-        reasons: List[str] = []
-        if category_match:
-            reasons.append(f"Strong category match with '{influencer.category}'")
-        if region_score == 1.0:
-            reasons.append(f"Region match for '{campaign.target_region}'")
-        if engagement_score >= 0.7:
-            reasons.append("High engagement rate relative to peers")
-        elif engagement_score >= 0.4:
-            reasons.append("Solid engagement rate relative to peers")
-        if age_match_score == 1.0:
-            reasons.append("Audience age aligns with target range")
-        if freshness_multiplier < 0.85:
-            reasons.append("Freshness decay applied due to stale stats")
-
-        if not reasons:
-            reasons.append("General relevance based on profile fit")
-
-        items.append(
-            RecommendationResponseItem(
-                influencer_id=influencer.id,
-                score=round(score, 4),
-                reasons=reasons,
-            )
+    if depth == RANKING_DEPTH:
+        # Deeper rankings are rare and would pin catalog-sized arrays.
+        _RANKING_CACHE.put(key, ranking)
+    return ranking
+
+
+def _covers(ranking: _Ranking, limit: int) -> bool:
+    return ranking.order.size >= min(limit, ranking.total)
+
+
+# --------- SHARDED SCORING ---------
+#
+# Large catalog requests are split into contiguous shards scored in the
+# process pool. Catalog columns live in shared memory per catalog version;
+# each task pickles only the campaign terms, its bounds and (when filtered)
+# its slice of candidate rows. Shards return their local top-``limit``,
+# merged here with a k-way heap merge.
+
+
+@tracing.traced("recommender", "sharded_score")
+def _sharded_ranking(
+    request: RecommendationRequest,
+    catalog: InfluencerCatalog,
+    rows: np.ndarray | None,
+    limit: int,
+) -> _Ranking:
+    columns = catalog.columns
+    total = len(columns) if rows is None else rows.size
+    engagement = columns.engagement if rows is None else columns.engagement[rows]
+    terms = _campaign_terms(request, columns, engagement)
+    shared = scoring_pool.share(
+        ("catalog", catalog.version),
+        lambda: {name: getattr(columns, name) for name in SHARED_COLUMNS},
+    )
+    bounds = np.linspace(0, total, scoring_pool.POOL_WORKERS + 1).astype(np.intp).tolist()
+    tasks = [
+        ShardTask(shared, terms, start, stop, None if rows is None else rows[start:stop], limit)
+        for start, stop in zip(bounds[:-1], bounds[1:])
+        if stop > start
+    ]
+    shards = scoring_pool.map_shards(score_shard, tasks)
+
+    # Each shard is sorted by (-score, position); merging on the same key
+    # reproduces the single-process order exactly.
+    merged = heapq.merge(
+        *(zip((-scores).tolist(), positions.tolist()) for positions, scores in shards)
+    )
+    positions = np.fromiter(
+        (position for _, position in itertools.islice(merged, limit)), dtype=np.intp
+    )
+    survivors = columns.take(positions if rows is None else rows[positions])
+    factors = _score_columns(terms, survivors)
+    order = np.arange(len(survivors), dtype=np.intp)
+    return _Ranking(survivors, factors, order, total, catalog.version)
+
+
+def _page_items(
+    ranking: _Ranking, rows: np.ndarray, target_region: str
+) -> Iterator[RecommendationResponseItem]:
+    columns, factors = ranking.columns, ranking.factors
+    for row in rows.tolist():
+        yield RecommendationResponseItem(
+            influencer_id=columns.ids[row],
+            score=round(float(factors.scores[row]), 4),
+            reasons=_reasons(columns, factors, row, target_region),
         )
 
-    ranked = sorted(items, key=lambda item: item.score, reverse=True)[:top_n]
-    return RecommendationResponse(
-        campaign_id=campaign.id,
-        recommendations=ranked,
+
+def _result_cache_key(request: RecommendationRequest, top_n: int | None) -> str | None:
+    if request.influencers is None:
+        source = f"catalog:{get_catalog().version}"
+    elif len(request.influencers) <= RESULT_CACHE_INLINE_MAX:
+        source = "inline"
+    else:
+        return None
+    weights = (CONTENT_WEIGHT, REGION_WEIGHT, ENGAGEMENT_WEIGHT, AGE_WEIGHT)
+    payload = f"{source}|{weights}|{top_n}|{request.model_dump_json()}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _request_fingerprint(request: RecommendationRequest) -> str:
+    payload = request.model_dump_json(
+        exclude={"influencers", "top_n", "offset", "cursor"}
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _encode_cursor(offset: int, catalog_version: int | None) -> str:
+    payload = json.dumps({"offset": offset, "catalog_version": catalog_version})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> Tuple[int, int | None]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        offset = int(payload["offset"])
+        version = payload.get("catalog_version")
+        version = int(version) if version is not None else None
+    except (ValueError, TypeError, KeyError, UnicodeError) as exc:
+        raise InvalidCursorError(f"Invalid cursor: {cursor!r}") from exc
+    if offset < 0:
+        raise InvalidCursorError(f"Invalid cursor: {cursor!r}")
+    return offset, version
+
+
+@tracing.traced("recommender", "filter")
+def _candidate_rows(
+    request: RecommendationRequest,
+    columns: InfluencerColumns,
+    index: InvertedIndex | None,
+    id_index: IdIndex | None,
+) -> np.ndarray | None:
+    """Rows of ``columns`` to score, or None for all of them.
+
+    ``influencer_ids``, ``filters`` and ``strict_filters`` narrow the set
+    through the inverted index before any scoring happens. Engagement is
+    later normalized over the resolved set, exactly as for an inline list.
+    """
+    constraints = _constraints(request, columns)
+    if request.influencer_ids is None and not constraints:
+        return None
+
+    rows = None
+    if request.influencer_ids is not None:
+        if id_index is None:
+            id_index = IdIndex(columns.ids)
+        rows = id_index.rows(request.influencer_ids)
+    if constraints:
+        if index is None:
+            index = build_inverted_index(columns)
+        rows = index.match(constraints, within=rows)
+    return rows
+
+
+def _constraints(
+    request: RecommendationRequest, columns: InfluencerColumns
+) -> List[Tuple[str, Sequence[str]]]:
+    constraints: List[Tuple[str, Sequence[str]]] = []
+    filters = request.filters
+    if filters is not None:
+        for field, values in (
+            ("region", filters.regions),
+            ("category", filters.categories),
+            ("age_range", filters.age_ranges),
+            ("platform", filters.platforms),
+        ):
+            if values is not None:
+                constraints.append((field, values))
+
+    campaign = request.campaign
+    for field in dict.fromkeys(request.strict_filters or ()):
+        if field == "region":
+            constraints.append(("region", [campaign.target_region]))
+        elif field == "age_range":
+            constraints.append(("age_range", [campaign.target_age_range]))
+        elif field == "category":
+            # Same substring test the content score uses.
+            haystack = f"{campaign.description} {campaign.goal}".lower()
+            matching = [
+                value
+                for value, key in zip(columns.categories, columns.category_keys)
+                if key in haystack
+            ]
+            constraints.append(("category", matching))
+    return constraints
+
+
+def _campaign_terms(
+    request: RecommendationRequest, columns: InfluencerColumns, engagement: np.ndarray
+) -> CampaignTerms:
+    """``columns`` supplies the value dictionaries; ``engagement`` the candidate set."""
+    campaign = request.campaign
+    content_haystack = f"{campaign.description} {campaign.goal}".lower()
+    category_hits = np.array(
+        [key in content_haystack for key in columns.category_keys], dtype=bool
+    )
+    return CampaignTerms(
+        category_hits=category_hits,
+        region_code=_code_of(columns.regions, campaign.target_region),
+        age_code=_code_of(columns.age_ranges, campaign.target_age_range),
+        engagement_low=float(engagement.min()) if engagement.size else 0.0,
+        engagement_high=float(engagement.max()) if engagement.size else 0.0,
+        now_us=epoch_us(datetime.now(timezone.utc)),
+    )
+
+
+@tracing.traced("recommender", "score")
+def _score_columns(terms: CampaignTerms, columns: InfluencerColumns) -> FactorScores:
+    return factor_scores(
+        terms,
+        columns.category_codes,
+        columns.region_codes,
+        columns.age_codes,
+        columns.engagement,
+        columns.stats_updated_us,
     )
+
+
+def _reasons(
+    columns: InfluencerColumns, factors: FactorScores, row: int, target_region: str
+) -> List[str]:
+    reasons: List[str] = []
+    if factors.category_match[row]:
+        reasons.append(f"Strong category match with '{columns.category(row)}'")
+    if factors.region_match[row]:
+        reasons.append(f"Region match for '{target_region}'")
+    engagement_score = factors.engagement[row]
+    if engagement_score >= 0.7:
+        reasons.append("High engagement rate relative to peers")
+    elif engagement_score >= 0.4:
+        reasons.append("Solid engagement rate relative to peers")
+    if factors.age_match[row]:
+        reasons.append("Audience age aligns with target range")
+    if factors.freshness[row] < 0.85:
+        reasons.append("Freshness decay applied due to stale stats")
+
+    if not reasons:
+        reasons.append("General relevance based on profile fit")
+    return reasons
+
+
+def _code_of(values: Tuple[str, ...], value: str) -> int:
+    try:
+        return values.index(value)
+    except ValueError:
+        return -1
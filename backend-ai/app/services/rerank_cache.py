@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class RerankCache:
+    """SQLite-backed store of LLM rerank scores that survives restarts.
+
+    Entries are keyed by (query, ordered candidate ids, model) and evicted
+    least-recently-used once the table grows past ``max_entries``. WAL mode
+    lets every uvicorn worker on the node share one file. An empty ``path``
+    disables the cache.
+    """
+
+    def __init__(self, path: str, max_entries: int) -> None:
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._errors = 0
+
+    def get(self, query: str, candidate_ids: List[str], model: str) -> Dict[str, float] | None:
+        if not self.path:
+            return None
+        key = self._key(query, candidate_ids, model)
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT scores FROM rerank_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    self._misses += 1
+                    return None
+                conn.execute(
+                    "UPDATE rerank_cache SET accessed_at = ? WHERE key = ?", (time.time(), key)
+                )
+                self._hits += 1
+                return json.loads(row[0])
+        except sqlite3.Error:
+            self._errors += 1
+            logger.exception("rag.rerank_cache.get_failed path=%s", self.path)
+            return None
+
+    def put(
+        self, query: str, candidate_ids: List[str], model: str, scores: Dict[str, float]
+    ) -> None:
+        # An empty map is a rerank that produced nothing; caching it would
+        # turn the failure into a permanent hit.
+        if not self.path or not scores:
+            return
+        key = self._key(query, candidate_ids, model)
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO rerank_cache (key, scores, accessed_at) "
+                    "VALUES (?, ?, ?)",
+                    (key, json.dumps(scores), time.time()),
+                )
+                # Counted from the table: every worker on the node writes to it.
+                self._size = conn.execute("SELECT COUNT(*) FROM rerank_cache").fetchone()[0]
+                if self._size > self.max_entries:
+                    self._evict(conn)
+        except sqlite3.Error:
+            self._errors += 1
+            logger.exception("rag.rerank_cache.put_failed path=%s", self.path)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": self._size,
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "errors": self._errors,
+                "hit_rate": (self._hits / lookups) if lookups else 0.0,
+            }
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use. Caller holds _lock."""
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rerank_cache ("
+                "key TEXT PRIMARY KEY, scores TEXT NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS rerank_cache_accessed_at "
+                "ON rerank_cache (accessed_at)"
+            )
+            self._size = conn.execute("SELECT COUNT(*) FROM rerank_cache").fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Trim to max_entries by last access. Caller holds _lock."""
+        deleted = conn.execute(
+            "DELETE FROM rerank_cache WHERE key IN ("
+            "SELECT key FROM rerank_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        ).rowcount
+        self._evictions += max(deleted, 0)
+        self._size = conn.execute("SELECT COUNT(*) FROM rerank_cache").fetchone()[0]
+
+    @staticmethod
+    def _key(query: str, candidate_ids: List[str], model: str) -> str:
+        normalized = " ".join(query.lower().split())
+        payload = json.dumps([model, normalized, candidate_ids], separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
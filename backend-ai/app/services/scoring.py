@@ -0,0 +1,126 @@
+import math
+from dataclasses import dataclass
+from typing import Tuple
+
+import numpy as np
+
+from app.services import scoring_pool
+from app.services.ranking import top_k_indices
+from app.services.scoring_pool import SharedArrays
+
+# The vectorized scoring kernel shared by the recommender and the scoring
+# pool workers. Spawned workers import this module, not the recommender,
+# so it must stay free of app.services.catalog: importing the catalog
+# builds the whole catalog and its inverted indexes at import time.
+
+CONTENT_WEIGHT = 0.4
+REGION_WEIGHT = 0.25
+ENGAGEMENT_WEIGHT = 0.25
+AGE_WEIGHT = 0.10
+
+_DAY_US = 86_400_000_000
+# max(0.6, exp(-days / 30)) by age in days, up to the first day at the
+# floor; older rows clip to the last entry. math.exp keeps the table
+# bit-identical to the scalar formula.
+_FRESHNESS_FLOOR_DAY = math.ceil(-30 * math.log(0.6))
+_FRESHNESS_DECAY = np.array(
+    [max(0.6, math.exp(-day / 30)) for day in range(_FRESHNESS_FLOOR_DAY + 1)]
+)
+
+# InfluencerColumns fields placed in shared memory for the pool workers.
+SHARED_COLUMNS = ("category_codes", "region_codes", "age_codes", "engagement", "stats_updated_us")
+
+
+@dataclass(frozen=True)
+class FactorScores:
+    category_match: np.ndarray
+    region_match: np.ndarray
+    engagement: np.ndarray
+    age_match: np.ndarray
+    freshness: np.ndarray
+    scores: np.ndarray
+
+
+@dataclass(frozen=True)
+class CampaignTerms:
+    """Per-request inputs of the vectorized scorer, small enough to pickle."""
+
+    # Indexed by category code: does the category appear in the brief?
+    category_hits: np.ndarray
+    region_code: int
+    age_code: int
+    engagement_low: float
+    engagement_high: float
+    now_us: int
+
+
+@dataclass(frozen=True)
+class ShardTask:
+    shared: SharedArrays
+    terms: CampaignTerms
+    start: int
+    stop: int
+    # Catalog rows for positions start..stop; None when scoring the
+    # unfiltered catalog, where position == row.
+    rows: np.ndarray | None
+    limit: int
+
+
+def score_shard(task: ShardTask) -> Tuple[np.ndarray, np.ndarray]:
+    """Pool worker: score one shard and return (positions, rounded scores) of its top."""
+    arrays = scoring_pool.attach(task.shared)
+    select = slice(task.start, task.stop) if task.rows is None else task.rows
+    factors = factor_scores(task.terms, *(arrays[name][select] for name in SHARED_COLUMNS))
+    rounded = np.round(factors.scores, 4)
+    local = top_k_indices(rounded, task.limit)
+    return local + task.start, rounded[local]
+
+
+def factor_scores(
+    terms: CampaignTerms,
+    category_codes: np.ndarray,
+    region_codes: np.ndarray,
+    age_codes: np.ndarray,
+    engagement: np.ndarray,
+    stats_updated_us: np.ndarray,
+) -> FactorScores:
+    category_match = terms.category_hits[category_codes]
+    content_score = np.where(category_match, 1.0, 0.2)
+
+    region_match = region_codes == terms.region_code
+    region_score = region_match.astype(np.float64)
+
+    engagement_score = _normalize_engagement(
+        engagement, terms.engagement_low, terms.engagement_high
+    )
+
+    age_match = age_codes == terms.age_code
+    age_match_score = np.where(age_match, 1.0, 0.3)
+
+    base_score = (
+        CONTENT_WEIGHT * content_score
+        + REGION_WEIGHT * region_score
+        + ENGAGEMENT_WEIGHT * engagement_score
+        + AGE_WEIGHT * age_match_score
+    )
+    freshness = _freshness_multiplier(stats_updated_us, terms.now_us)
+    return FactorScores(
+        category_match=category_match,
+        region_match=region_match,
+        engagement=engagement_score,
+        age_match=age_match,
+        freshness=freshness,
+        scores=base_score * freshness,
+    )
+
+
+def _normalize_engagement(engagement: np.ndarray, low: float, high: float) -> np.ndarray:
+    if high == low:
+        return np.ones_like(engagement)
+    return (engagement - low) / (high - low)
+
+
+def _freshness_multiplier(stats_updated_us: np.ndarray, now_us: int) -> np.ndarray:
+    # Future timestamps and MISSING_TIMESTAMP_US clip to day 0 (no decay).
+    days = np.clip((now_us - stats_updated_us) // _DAY_US, 0, _FRESHNESS_DECAY.size - 1)
+    return _FRESHNESS_DECAY[days]
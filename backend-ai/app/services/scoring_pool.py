@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import importlib
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, Dict, Hashable, Iterable, List, Mapping, Tuple, TypeVar
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# 0 keeps all scoring in-process.
+POOL_WORKERS = int(os.environ.get("RECOMMEND_POOL_WORKERS", "0"))
+# Candidate count at which a request is sharded across the pool.
+SHARD_THRESHOLD = int(os.environ.get("RECOMMEND_SHARD_THRESHOLD", "200000"))
+
+_ALIGNMENT = 64
+
+
+@dataclass(frozen=True)
+class SharedArrays:
+    """Picklable handle to NumPy arrays packed into one shared-memory block.
+
+    Only the block name and per-array (offset, dtype, shape) travel to the
+    workers; the data itself is mapped, never copied or pickled.
+    """
+
+    name: str
+    layout: Tuple[Tuple[str, int, str, Tuple[int, ...]], ...]
+
+
+class SharedArraysOwner:
+    """Creator side of a SharedArrays block; unlink it once no longer needed."""
+
+    def __init__(self, arrays: Mapping[str, np.ndarray]) -> None:
+        layout: List[Tuple[str, int, str, Tuple[int, ...]]] = []
+        offset = 0
+        for key, array in arrays.items():
+            offset = -(-offset // _ALIGNMENT) * _ALIGNMENT
+            layout.append((key, offset, array.dtype.str, array.shape))
+            offset += array.nbytes
+        self._shm = SharedMemory(create=True, size=max(offset, 1))
+        for (_, start, _, _), array in zip(layout, arrays.values()):
+            view = np.ndarray(array.shape, dtype=array.dtype, buffer=self._shm.buf, offset=start)
+            view[...] = array
+        self.handle = SharedArrays(name=self._shm.name, layout=tuple(layout))
+
+    def unlink(self) -> None:
+        self._shm.close()
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+_SHARED: Dict[Hashable, SharedArraysOwner] = {}
+_SHARED_LOCK = threading.Lock()
+# Keep the previous block too, for requests still scoring against it.
+_MAX_SHARED = 2
+
+
+def share(key: Hashable, arrays: Callable[[], Mapping[str, np.ndarray]]) -> SharedArrays:
+    """Return the shared block for ``key``, creating it from ``arrays()`` once."""
+    with _SHARED_LOCK:
+        owner = _SHARED.get(key)
+        if owner is None:
+            owner = SharedArraysOwner(arrays())
+            _SHARED[key] = owner
+            while len(_SHARED) > _MAX_SHARED:
+                _SHARED.pop(next(iter(_SHARED))).unlink()
+        return owner.handle
+
+
+# --------- WORKER SIDE ---------
+
+# Blocks mapped by this worker process, most recent last.
+_ATTACHED: Dict[str, Tuple[SharedMemory, Dict[str, np.ndarray]]] = {}
+_MAX_ATTACHED = 2
+
+
+def attach(handle: SharedArrays) -> Dict[str, np.ndarray]:
+    """Map ``handle`` into this process (cached) and return read-only views."""
+    entry = _ATTACHED.get(handle.name)
+    if entry is None:
+        # Spawned pool workers share the parent's resource tracker, so
+        # attaching here does not take over ownership of the block.
+        shm = SharedMemory(name=handle.name)
+        arrays = {}
+        for key, offset, dtype, shape in handle.layout:
+            view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+            view.flags.writeable = False
+            arrays[key] = view
+        entry = (shm, arrays)
+        _ATTACHED[handle.name] = entry
+        while len(_ATTACHED) > _MAX_ATTACHED:
+            stale, views = _ATTACHED.pop(next(iter(_ATTACHED)))
+            del views
+            try:
+                stale.close()
+            except BufferError:
+                # A view is still referenced; the mapping goes with it.
+                pass
+    return entry[1]
+
+
+# --------- POOL ---------
+
+_POOL: ProcessPoolExecutor | None = None
+_POOL_LOCK = threading.Lock()
+
+
+def enabled() -> bool:
+    return POOL_WORKERS > 1
+
+
+def start() -> None:
+    """Spawn the pool eagerly so the first sharded request pays no startup."""
+    if enabled():
+        # Workers are spawned on the first submit; a no-op task starts
+        # them (and their preload) in the background.
+        _pool().submit(int)
+
+
+def map_shards(fn: Callable[[T], R], tasks: Iterable[T]) -> List[R]:
+    return list(_pool().map(fn, tasks))
+
+
+def shutdown() -> None:
+    global _POOL
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+    with _SHARED_LOCK:
+        for owner in _SHARED.values():
+            owner.unlink()
+        _SHARED.clear()
+
+
+def _preload() -> None:
+    # Import the shard kernel up front rather than on the first task; not the
+    # recommender, whose catalog import would build the catalog per worker.
+    importlib.import_module("app.services.scoring")
+
+
+def _pool() -> ProcessPoolExecutor:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            # spawn: forking a threaded server process is unsafe.
+            _POOL = ProcessPoolExecutor(
+                max_workers=POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_preload,
+            )
+            logger.info("scoring_pool.started workers=%s", POOL_WORKERS)
+        return _POOL
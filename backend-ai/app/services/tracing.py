@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import functools
+import inspect
+import os
+import time
+from contextvars import ContextVar, Token
+from typing import Callable, Dict, List, Tuple, TypeVar
+
+from app.services import observability
+
+# Spans time named stages of a request (rag.vectorize, recommender.top_k,
+# agent.draft, ...). A closed span feeds the stage_duration_seconds
+# histograms and, inside a traced request, that request's breakdown, which
+# request_context_middleware logs with the request id. Stages may nest:
+# rag.score covers rag.matmul and rag.normalize.
+ENABLED = os.environ.get("TRACING_ENABLED", "true").lower() == "true"
+# Also return the breakdown to clients as a Server-Timing header.
+SERVER_TIMING = os.environ.get("TRACING_SERVER_TIMING", "false").lower() == "true"
+
+_F = TypeVar("_F", bound=Callable)
+
+# (stage, ms) pairs closed in the current request. Copied contexts share the
+# list, so spans closed in worker threads (asyncio.to_thread, the endpoint
+# threadpool) and child tasks land in it too; list.append is atomic.
+_TRACE: ContextVar[List[Tuple[str, float]] | None] = ContextVar("trace", default=None)
+
+
+class Span:
+    """Times a block as ``stage`` of ``component``; see span()."""
+
+    __slots__ = ("component", "stage", "elapsed_ms", "_start")
+
+    def __init__(self, component: str, stage: str) -> None:
+        self.component = component
+        self.stage = stage
+        self.elapsed_ms = 0.0
+        self._start = 0.0
+
+    def __enter__(self) -> Span:
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.elapsed_ms = (time.perf_counter() - self._start) * 1000
+        if not ENABLED:
+            return
+        observability.record_stage(self.component, self.stage, self.elapsed_ms)
+        trace = _TRACE.get()
+        if trace is not None:
+            trace.append((f"{self.component}.{self.stage}", self.elapsed_ms))
+
+
+def span(component: str, stage: str) -> Span:
+    """Context manager timing its block as ``component.stage``.
+
+    ``elapsed_ms`` is set on exit even with tracing disabled, which then
+    costs two perf_counter() calls and records nothing.
+    """
+    return Span(component, stage)
+
+
+def traced(component: str, stage: str | None = None) -> Callable[[_F], _F]:
+    """Decorator form of span(); ``stage`` defaults to the function's name.
+
+    With tracing disabled the function is returned undecorated.
+    """
+
+    def decorate(fn: _F) -> _F:
+        if not ENABLED:
+            return fn
+        name = stage or fn.__name__.lstrip("_")
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with Span(component, name):
+                    return await fn(*args, **kwargs)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with Span(component, name):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def start_trace() -> Token | None:
+    """Collect the spans closed in the current context; None when disabled."""
+    if not ENABLED:
+        return None
+    return _TRACE.set([])
+
+
+def finish_trace(token: Token | None) -> Dict[str, float]:
+    """Stop collecting; return total milliseconds per stage in first-closed order."""
+    if token is None:
+        return {}
+    trace = _TRACE.get() or []
+    _TRACE.reset(token)
+    stages: Dict[str, float] = {}
+    for name, ms in list(trace):
+        stages[name] = stages.get(name, 0.0) + ms
+    return stages
+
+
+def server_timing(stages: Dict[str, float], total_ms: float) -> str:
+    """Format a stage breakdown as a Server-Timing header value."""
+    entries = [f"{name};dur={ms:.3f}" for name, ms in stages.items()]
+    entries.append(f"total;dur={total_ms:.3f}")
+    return ", ".join(entries)
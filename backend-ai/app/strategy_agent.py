@@ -12,10 +12,13 @@ This aligns with agentic-AI patterns required in real MarTech AI systems.
 
 from __future__ import annotations
 from typing import List, Dict, Any
-from openai import OpenAI
 import json
+import os
 
-client = OpenAI()
+from app.services import http_client
+
+STRATEGY_MODEL = "gpt-4.1"
+STRATEGY_DEADLINE_S = float(os.environ.get("STRATEGY_LLM_DEADLINE_S", "60"))
 
 
 # -------------------------------------------------------
@@ -53,7 +56,7 @@ def get_recommendation_summary(recommendations: List[Dict[str, Any]]) -> Dict[st
 # MAIN AGENT FUNCTION
 # -------------------------------------------------------
 
-def generate_strategy_agent(
+async def generate_strategy_agent(
     campaign: Dict[str, Any],
     recommendations: List[Dict[str, Any]],
     question: str | None
@@ -61,7 +64,11 @@ def generate_strategy_agent(
     """
     Main entry point for the agent.
     Uses OpenAI's tool-calling capabilities to produce structured strategy outputs.
+    Calls go through the shared pooled client in app.services.http_client.
     """
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if not api_key:
+        raise RuntimeError("OPENAI_API_KEY is not set")
 
     system_prompt = """
 You are NivoxAI – an elite marketing strategy AI agent for influencer campaigns.
@@ -113,21 +120,26 @@ Your output must be:
     # ------------------------------
     # FIRST MODEL CALL
     # ------------------------------
-    response = client.chat.completions.create(
-        model="gpt-4.1",
-        messages=messages,
-        tools=tools,
-        tool_choice="auto"
+    response = await http_client.chat_completion(
+        {
+            "model": STRATEGY_MODEL,
+            "messages": messages,
+            "tools": tools,
+            "tool_choice": "auto",
+        },
+        api_key,
+        deadline_s=STRATEGY_DEADLINE_S,
     )
 
-    msg = response.choices[0].message
+    msg = response["choices"][0]["message"]
 
     # If the model calls a tool, execute it
-    if msg.tool_calls:
-        final_messages = messages.copy()
+    if msg.get("tool_calls"):
+        # The assistant turn that requested the tools must precede their results
+        final_messages = messages + [msg]
 
-        for tool_call in msg.tool_calls:
-            if tool_call.function.name == "get_recommendation_summary":
+        for tool_call in msg["tool_calls"]:
+            if tool_call["function"]["name"] == "get_recommendation_summary":
 
                 tool_result = get_recommendation_summary(recommendations)
 
@@ -135,28 +147,29 @@ Your output must be:
                 final_messages.append(
                     {
                         "role": "tool",
-                        "tool_call_id": tool_call.id,
+                        "tool_call_id": tool_call["id"],
                         "content": json.dumps(tool_result)
                     }
                 )
 
         # SECOND call: Model now continues reasoning with tool output
-        followup = client.chat.completions.create(
-            model="gpt-4.1",
-            messages=final_messages
+        followup = await http_client.chat_completion(
+            {"model": STRATEGY_MODEL, "messages": final_messages},
+            api_key,
+            deadline_s=STRATEGY_DEADLINE_S,
         )
 
-        return followup.choices[0].message.to_dict()
+        return followup["choices"][0]["message"]
 
     # If no tool call, return first message directly
-    return msg.to_dict()
+    return msg
 
 
 # -------------------------------------------------------
 # Wrapper used by FastAPI endpoint
 # -------------------------------------------------------
 
-def generate_strategy_reply(
+async def generate_strategy_reply(
     campaign: Dict[str, Any],
     recommendations: List[Dict[str, Any]],
     user_question: str | None
@@ -165,11 +178,11 @@ def generate_strategy_reply(
     Simple wrapper that returns the agent's final textual reply.
     """
 
-    result = generate_strategy_agent(
+    result = await generate_strategy_agent(
         campaign=campaign,
         recommendations=recommendations,
         question=user_question,
     )
 
     # LLM always returns message dict with "content"
-    return result.get("content", "")
+    return result.get("content") or ""